@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""
+Measures how fast the console parses scripted command lines, against
+the eval-based parsing it replaced
+
+Usage: python3 -m benchmarks.bench_console_parser [count]
+(count defaults to 1000000 lines; the parser should handle at least
+TARGET times as many lines per second as the old code)
+"""
+import sys
+import time
+from uuid import uuid4
+import console_parser
+
+TARGET = 3
+COMMANDS = ['all', 'count', 'show', 'destroy', 'update']
+
+
+def generate(count):
+    """Returns count command lines mixing the console forms"""
+    lines = []
+    for i in range(count):
+        _id = str(uuid4())
+        lines.append((
+            'User.update("{}", {{"first_name": "John", "age": {}}})',
+            'User.update("{}", "last_name", "Smith {}")',
+            'Place.show("{}"){}',
+            'create Place city_id="{}" name="House_{}" latitude=37.7',
+        )[i % 4].format(_id, i))
+    return lines
+
+
+def parse(line):
+    """Parses line the way the console does now"""
+    dot = console_parser.parse_dot(line, COMMANDS)
+    if dot is not None:
+        return dot[1]
+    command, _, args = line.partition(' ')
+    if command == 'create':
+        return [console_parser.parse_param(word)
+                for word in args.split()[1:]]
+    return console_parser.split(args)
+
+
+def legacy(line):
+    """Parses line the way the console did with eval"""
+    if '.' in line and '(' in line and ')' in line:
+        _cls = line[:line.find('.')]
+        _cmd = line[line.find('.') + 1:line.find('(')]
+        _id = _args = ''
+        pline = line[line.find('(') + 1:line.find(')')]
+        if pline:
+            pline = pline.partition(', ')
+            _id = pline[0].replace('\"', '')
+            pline = pline[2].strip()
+            if pline:
+                if pline[0] == '{' and pline[-1] == '}' \
+                        and type(eval(pline)) is dict:
+                    _args = pline
+                else:
+                    _args = pline.replace(',', '')
+        line = ' '.join([_cmd, _cls, _id, _args])
+    command, _, args = line.partition(' ')
+    if command == 'create':
+        params = []
+        for param in args.split()[1:]:
+            key, value = param.split('=', 1)
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1].replace('\\"', '"').replace('_', ' ')
+            elif '.' in value:
+                value = float(value)
+            else:
+                value = int(value)
+            params.append((key, value))
+        return params
+    args = args.partition(' ')[2].partition(' ')
+    if '{' in args[2] and '}' in args[2] and type(eval(args[2])) is dict:
+        return eval(args[2])
+    return args
+
+
+def run(function, lines):
+    """Returns the lines parsed per second by function"""
+    start = time.perf_counter()
+    for line in lines:
+        function(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    lines = generate(count)
+    print("{} lines".format(count))
+    old = run(legacy, lines)
+    new = run(parse, lines)
+    print("{:<8} {:>12}".format("parser", "lines/s"))
+    print("{:<8} {:>12.0f}".format("eval", old))
+    print("{:<8} {:>12.0f}".format("compiled", new))
+    print("speedup {:.1f}x (target {}x)".format(new / old, TARGET))
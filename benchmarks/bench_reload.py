@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Times FileStorage.reload on a generated dataset with 1, 2, 4... worker
+processes (HBNB_RELOAD_PROCESSES), up to the number of cores
+
+Usage: python3 -m benchmarks.bench_reload [count]
+(count defaults to 1000000 objects)
+"""
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+from benchmarks.bench_serializers import generate
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import get_serializer
+
+
+def run(processes):
+    """Returns the reload time and record count with processes workers"""
+    with patch.dict(os.environ, {'HBNB_RELOAD_PROCESSES': str(processes)}):
+        storage = FileStorage()
+    storage.all().clear()
+    start = time.perf_counter()
+    storage.reload()
+    seconds = time.perf_counter() - start
+    count = len(storage.all())
+    storage.all().clear()
+    return seconds, count
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    cores = os.cpu_count() or 1
+    print("{} objects, {} cores".format(count, cores))
+    print("{:>9} {:>10} {:>8}".format("processes", "reload (s)", "speedup"))
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        with open('file.json', 'w') as f:
+            get_serializer('json').dump(generate(count), f)
+        processes, base = 1, None
+        while True:
+            seconds, loaded = run(processes)
+            assert loaded == count
+            base = base or seconds
+            print("{:>9} {:>10.2f} {:>7.2f}x".format(
+                processes, seconds, base / seconds))
+            if processes >= cores:
+                break
+            processes = min(processes * 2, cores)
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Compares the FileStorage snapshot formats on a generated dataset
+
+Usage: python3 -m benchmarks.bench_serializers [count]
+(count defaults to 1000000 objects)
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+from models.engine.serializers import get_serializer, serializers
+
+
+def generate(count):
+    """Yields count (key, record) pairs shaped like saved Places"""
+    now = datetime.utcnow()
+    for i in range(count):
+        _id = str(uuid4())
+        yield 'Place.' + _id, {
+            'id': _id, '__class__': 'Place',
+            'created_at': now - timedelta(seconds=i), 'updated_at': now,
+            'city_id': str(uuid4()), 'user_id': str(uuid4()),
+            'name': 'Place {}'.format(i), 'number_rooms': i % 7,
+            'number_bathrooms': i % 3, 'max_guest': i % 11,
+            'price_by_night': i % 500, 'latitude': 37.77 + i * 1e-6,
+            'longitude': -122.42 - i * 1e-6, 'amenity_ids': []}
+
+
+def run(name, records, directory):
+    """Returns the save time, load time and size of one format"""
+    fmt = get_serializer(name)
+    path = os.path.join(directory, 'file.' + name)
+    start = time.perf_counter()
+    with open(path, 'wb' if fmt.binary else 'w') as f:
+        fmt.dump(iter(records), f)
+    saved = time.perf_counter()
+    with open(path, 'rb' if fmt.binary else 'r') as f:
+        for key, record in fmt.load(f):
+            created_at = record['created_at']
+            if not isinstance(created_at, datetime):
+                datetime.fromisoformat(created_at)
+                datetime.fromisoformat(record['updated_at'])
+    loaded = time.perf_counter()
+    size = os.path.getsize(path)
+    os.remove(path)
+    return saved - start, loaded - saved, size
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    records = list(generate(count))
+    print("{} objects".format(count))
+    print("{:<8} {:>9} {:>9} {:>10}".format(
+        "format", "save (s)", "load (s)", "size (MB)"))
+    with tempfile.TemporaryDirectory() as directory:
+        for name in serializers:
+            save, load, size = run(name, records, directory)
+            print("{:<8} {:>9.2f} {:>9.2f} {:>10.1f}".format(
+                name, save, load, size / 1e6))
@@ -1,8 +1,20 @@
 #!/usr/bin/python3
 """ Console Module """
+import argparse
 import cmd
+import csv
+import json
+import re
+import shlex
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+import console_parser
 import models
+from models.engine import bulk
+from models.engine.file_storage import FileStorage
 from models.base_model import BaseModel
 from models.user import User
 from models.place import Place
@@ -26,12 +38,21 @@ class HBNBCommand(cmd.Cmd):
 
     dot_cmds = ['all', 'count', 'show', 'destroy', 'update']
 
+    # commands that only read the storage, which --jobs runs in parallel
+    read_cmds = ('all', 'count', 'show', 'export')
+
     types = {
         'number_rooms': int, 'number_bathrooms': int,
         'max_guest': int, 'price_by_night': int,
         'latitude': float, 'longitude': float
     }
 
+    def __init__(self, *args, **kwargs):
+        """Instantiate a HBNBCommand object"""
+        super().__init__(*args, **kwargs)
+        # the arguments precmd split from a dot command, in each thread
+        self.__dot = threading.local()
+
     def preloop(self):
         """Prints if isatty is false"""
         if not sys.__stdin__.isatty():
@@ -43,49 +64,26 @@ class HBNBCommand(cmd.Cmd):
         Usage: <class name>.<command>([<id> [<*args> or <**kwargs>]])
         (Brackets denote optional fields in usage example.)
         """
-        _cmd = _cls = _id = _args = ''  # initialize line elements
-
-        # scan for general formatting - i.e '.', '(', ')'
-        if not ('.' in line and '(' in line and ')' in line):
-            return line
-
-        try:  # parse line left to right
-            pline = line[:]  # parsed line
-
-            # isolate <class name>
-            _cls = pline[:pline.find('.')]
-
-            # isolate and validate <command>
-            _cmd = pline[pline.find('.') + 1:pline.find('(')]
-            if _cmd not in HBNBCommand.dot_cmds:
-                raise Exception
-
-            # if parentheses contain arguments, parse them
-            pline = pline[pline.find('(') + 1:pline.find(')')]
-            if pline:
-                # partition args: (<id>, [<delim>], [<*args>])
-                pline = pline.partition(', ')  # pline convert to tuple
-
-                # isolate _id, stripping quotes
-                _id = pline[0].replace('\"', '')
-                # possible bug here:
-                # empty quotes register as empty _id when replaced
-
-                # if arguments exist beyond _id
-                pline = pline[2].strip()  # pline is now str
-                if pline:
-                    # check for *args or **kwargs
-                    if pline[0] == '{' and pline[-1] == '}' \
-                            and type(eval(pline)) is dict:
-                        _args = pline
-                    else:
-                        _args = pline.replace(',', '')
-            line = ' '.join([_cmd, _cls, _id, _args])
-
-        except Exception as mess:
-            pass
-        finally:
+        dot = console_parser.parse_dot(line, HBNBCommand.dot_cmds)
+        if dot is None:
+            self.__dot.args = None
             return line
+        line, args = dot
+        self.__dot.args = line.partition(' ')[2].strip(), args
+        return line
+
+    def split(self, text):
+        """Returns the arguments in text, taking those precmd split from
+        the dot command being run instead of scanning text again"""
+        dot, self.__dot.args = getattr(self.__dot, 'args', None), None
+        if dot is not None and dot[0] == text:
+            return dot[1]
+        return console_parser.split(text)
+
+    def __run(self, line, dot):
+        """Runs line with dot, the arguments precmd split from it"""
+        self.__dot.args = dot
+        return self.onecmd(line)
 
     def postcmd(self, stop, line):
         """Prints if isatty is false"""
@@ -93,6 +91,58 @@ class HBNBCommand(cmd.Cmd):
             print('(hbnb) ', end='')
         return stop
 
+    def batch(self, lines, jobs=1):
+        """Runs a whole script without prompts and returns its timings
+
+        Every line is parsed before the first one runs, and the script
+        runs in a single storage batch, saved once at the end. With
+        jobs > 1 and a file storage, each run of consecutive read
+        commands is spread over jobs threads, their output still being
+        printed in script order. The script stops at quit or EOF.
+        """
+        start = time.perf_counter()
+        commands = []
+        for line in lines:
+            line = self.precmd(line)
+            dot, self.__dot.args = self.__dot.args, None
+            command, arg, line = self.parseline(line)
+            if command in ('quit', 'EOF'):
+                break
+            if line:
+                commands.append((command, line, dot))
+        parsed = time.perf_counter()
+
+        if not isinstance(models.storage, FileStorage):
+            # another thread's session would not see the batch's changes
+            jobs = 1
+        output = ThreadOutput(sys.stdout)
+        stdout, sys.stdout, self.stdout = sys.stdout, output, output
+        reads = []
+        try:
+            with models.storage.batch(), \
+                    ThreadPoolExecutor(max(jobs, 1)) as pool:
+                for i, (command, line, dot) in enumerate(commands):
+                    if jobs > 1 and command in self.read_cmds:
+                        reads.append(pool.submit(output.capture,
+                                                 self.__run, line, dot))
+                        if i + 1 < len(commands):
+                            continue
+                    for read in reads:
+                        stdout.write(read.result())
+                    if not reads or command not in self.read_cmds:
+                        self.__run(line, dot)
+                    reads = []
+                ran = time.perf_counter()
+        finally:
+            sys.stdout = self.stdout = stdout
+        saved = time.perf_counter()
+
+        return {'commands': len(commands),
+                'reads': sum(command in self.read_cmds
+                             for command, line, dot in commands),
+                'parse': parsed - start, 'run': ran - parsed,
+                'save': saved - ran, 'total': saved - start}
+
     def do_quit(self, command):
         """Method to exit the HBNB console"""
         exit()
@@ -130,34 +180,9 @@ class HBNBCommand(cmd.Cmd):
         new_instance = self.classes[class_name]()
 
         for param in arg_list[1:]:
-            if '=' not in param:
-                continue
-
-            try:
-                key, value = param.split('=', 1)
-
-                if value.startswith('"') and value.endswith('"'):
-                    value = value[1:-1]
-                    value = value.replace('\\"', '"')
-                    value = value.replace('_', ' ')
-
-                elif '.' in value:
-                    try:
-                        value = float(value)
-                    except ValueError:
-                        continue
-
-                else:
-                    try:
-                        value = int(value)
-                    except ValueError:
-                        continue
-
-                if hasattr(new_instance, key):
-                    setattr(new_instance, key, value)
-
-            except ValueError:
-                continue
+            param = console_parser.parse_param(param)
+            if param is not None and hasattr(new_instance, param[0]):
+                setattr(new_instance, *param)
 
         models.storage.new(new_instance)
         models.storage.save()
@@ -168,32 +193,117 @@ class HBNBCommand(cmd.Cmd):
         print("Creates a class of any type")
         print("[Usage]: create <className>\n")
 
-    def do_show(self, args):
-        """Method to show an individual object"""
-        new = args.partition(" ")
-        c_name = new[0]
-        c_id = new[2]
+    def do_bulk_import(self, args):
+        """Imports the JSON-lines or CSV records of a file"""
+        args = args.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in self.classes or args[0] == 'BaseModel':
+            print("** class doesn't exist **")
+            return
+        if len(args) < 2:
+            print("** file name missing **")
+            return
 
-        if c_id and ' ' in c_id:
-            c_id = c_id.partition(' ')[0]
+        errors = []
+        start = time.perf_counter()
+        try:
+            records = bulk.validated(self.classes[args[0]],
+                                     bulk.read_records(args[1]), errors)
+            count = models.storage.bulk_insert(args[0], records)
+        except OSError:
+            print("** file doesn't exist **")
+            return
+        elapsed = time.perf_counter() - start
+        for line, message in errors:
+            print("** line {}: {} **".format(line, message))
+        print("{} imported, {} rejected in {:.2f}s ({:.0f} rows/sec)".format(
+            count, len(errors), elapsed, count / elapsed if elapsed else 0))
+
+    def help_bulk_import(self):
+        """Help information for the bulk_import command"""
+        print("Imports objects from a JSON-lines or CSV file")
+        print("[Usage]: bulk_import <className> <file>\n")
+
+    def do_export(self, args):
+        """Streams the objects of a class as JSON lines or CSV"""
+        try:
+            args = shlex.split(args)
+        except ValueError:
+            args = args.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in self.classes:
+            print("** class doesn't exist **")
+            return
+        cls = self.classes[args[0]]
+        table = getattr(cls, '__table__', None)
+        columns = table.columns if table is not None else {}
+        fmt = 'jsonl'
+        conditions = []
+        options = iter(args[1:])
+        for option in options:
+            value = next(options, None)
+            if option == '--format' and value in ('jsonl', 'csv'):
+                fmt = value
+            elif option == '--where' and value is not None:
+                match = re.fullmatch(r'(\w+)\s*(!=|<=|>=|=|<|>)\s*(.*)',
+                                     value)
+                if match is None:
+                    print("** invalid condition: {} **".format(value))
+                    return
+                try:
+                    conditions.append(self.condition(cls, *match.groups()))
+                except ValueError as e:
+                    print("** {} **".format(e))
+                    return
+            else:
+                print("** invalid option: {} **".format(option))
+                return
 
-        if not c_name:
+        objs = models.storage.stream(args[0], conditions)
+        if fmt == 'csv':
+            fields = [column.key for column in columns] or \
+                ['id', 'created_at', 'updated_at']
+            writer = csv.DictWriter(sys.stdout, fields, lineterminator='\n',
+                                    extrasaction='ignore')
+            writer.writeheader()
+            for obj in objs:
+                writer.writerow(obj.to_dict())
+        else:
+            for obj in objs:
+                print(json.dumps(obj.to_dict()))
+
+    def help_export(self):
+        """Help information for the export command"""
+        print("Streams the objects of a class as JSON lines or CSV")
+        print("[Usage]: export <className> [--format jsonl|csv] "
+              "[--where <attr><op><value>]...\n")
+
+    def do_show(self, args):
+        """Method to show an individual object"""
+        args = self.split(args)
+        if not args:
             print("** class name missing **")
             return
+        c_name = args[0]
 
         if c_name not in HBNBCommand.classes:
             print("** class doesn't exist **")
             return
 
-        if not c_id:
+        if len(args) < 2:
             print("** instance id missing **")
             return
+        c_id = args[1]
 
-        key = c_name + "." + c_id
-        try:
-            print(models.storage.all()[key])
-        except KeyError:
+        obj = models.storage.get(c_name, c_id)
+        if obj is None:
             print("** no instance found **")
+        else:
+            print(obj)
 
     def help_show(self):
         """Help information for the show command"""
@@ -202,31 +312,27 @@ class HBNBCommand(cmd.Cmd):
 
     def do_destroy(self, args):
         """Destroys a specified object"""
-        new = args.partition(" ")
-        c_name = new[0]
-        c_id = new[2]
-        if c_id and ' ' in c_id:
-            c_id = c_id.partition(' ')[0]
-
-        if not c_name:
+        args = self.split(args)
+        if not args:
             print("** class name missing **")
             return
+        c_name = args[0]
 
         if c_name not in self.classes:
             print("** class doesn't exist **")
             return
 
-        if not c_id:
+        if len(args) < 2:
             print("** instance id missing **")
             return
+        c_id = args[1]
 
-        key = c_name + "." + c_id
-
-        try:
-            del (models.storage.all()[key])
-            models.storage.save()
-        except KeyError:
+        obj = models.storage.get(c_name, c_id)
+        if obj is None:
             print("** no instance found **")
+            return
+        models.storage.delete(obj)
+        models.storage.save()
 
     def help_destroy(self):
         """Help information for the destroy command"""
@@ -234,107 +340,130 @@ class HBNBCommand(cmd.Cmd):
         print("[Usage]: destroy <className> <objectId>\n")
 
     def do_all(self, args):
-        """Shows all objects, or all objects of a class"""
-        print_list = []
-
+        """Shows all objects, or the objects of a class matching a query"""
+        cls = None
+        conditions, order_by, limit = (), (), None
         if args:
-            class_name = args.split()[0]
+            class_name, _, text = args.strip().partition(' ')
             if class_name not in self.classes:
                 print("** class doesn't exist **")
                 return
-            for k, v in models.storage.all().items():
-                if k.split('.')[0] == class_name:
-                    print_list.append(str(v))
-        else:
-            for k, v in models.storage.all().items():
-                print_list.append(str(v))
+            cls = class_name
+            query = self.query(cls, text)
+            if query is None:
+                return
+            conditions, order_by, limit = query
 
-        print(print_list)
+        if order_by or limit is not None:
+            objs = models.storage.query(cls, conditions, order_by, limit)
+        else:
+            objs = models.storage.stream(cls, conditions)
+        # prints the list repr one object at a time instead of building it
+        sep = ''
+        sys.stdout.write('[')
+        for obj in objs:
+            sys.stdout.write(sep + repr(str(obj)))
+            sep = ', '
+        print(']')
 
     def help_all(self):
         """Help information for the all command"""
         print("Shows all objects, or all of a class")
-        print("[Usage]: all <className>\n")
+        print("[Usage]: all <className> [where <attr><op><value> "
+              "[and ...]] [order by <attr> [asc|desc], ...] [limit <n>]\n")
 
     def do_count(self, args):
-        """Count current number of class instances"""
-        count = 0
-        for k, v in models.storage.all().items():
-            if args == k.split('.')[0]:
-                count += 1
-        print(count)
+        """Count current number of class instances, or of those matching
+        a query"""
+        class_name, _, text = args.strip().partition(' ')
+        if class_name not in self.classes:
+            print(0)
+            return
+        query = self.query(class_name, text)
+        if query is None:
+            return
+        conditions, order_by, limit = query
+        count = models.storage.count(class_name, conditions)
+        print(count if limit is None else min(count, limit))
 
     def help_count(self):
         """Help information for count command"""
-        print("Usage: count <class_name>")
+        print("Usage: count <class_name> [where <attr><op><value> "
+              "[and ...]] [limit <n>]")
+
+    def condition(self, cls, attr, op, value):
+        """Returns the (attr, op, value) condition on the class cls, value
+        converted to the type of its column, or raises ValueError"""
+        if not hasattr(cls, attr):
+            raise ValueError("unknown attribute: {}".format(attr))
+        table = getattr(cls, '__table__', None)
+        if table is not None and attr in table.columns:
+            value = bulk.convert(table.columns[attr], value)
+        return attr, op, value
+
+    def query(self, class_name, text):
+        """Returns the (conditions, order_by, limit) of the query text on
+        class_name, or prints what is wrong with it and returns None"""
+        cls = self.classes[class_name]
+        try:
+            conditions, order_by, limit = console_parser.parse_query(text)
+            conditions = [self.condition(cls, *condition)
+                          for condition in conditions]
+            for attr in order_by:
+                if not hasattr(cls, attr.lstrip('-')):
+                    raise ValueError("unknown attribute: {}".format(
+                        attr.lstrip('-')))
+        except ValueError as e:
+            print("** {} **".format(e))
+            return None
+        return conditions, order_by, limit
 
     def do_update(self, args):
         """Updates a certain object with new info"""
-        c_name = c_id = att_name = att_val = kwargs = ''
-
-        args = args.partition(" ")
-        if args[0]:
-            c_name = args[0]
-        else:
+        args = self.split(args)
+        if not args:
             print("** class name missing **")
             return
+        c_name = args[0]
         if c_name not in self.classes:
             print("** class doesn't exist **")
             return
 
-        args = args[2].partition(" ")
-        if args[0]:
-            c_id = args[0]
-        else:
+        if len(args) < 2:
             print("** instance id missing **")
             return
 
-        key = c_name + "." + c_id
-
-        if key not in models.storage.all():
+        new_dict = models.storage.get(c_name, args[1])
+        if new_dict is None:
             print("** no instance found **")
             return
 
-        if '{' in args[2] and '}' in args[2] and type(eval(args[2])) is dict:
-            kwargs = eval(args[2])
-            args = []
-            for k, v in kwargs.items():
-                args.append(k)
-                args.append(v)
+        if len(args) > 2 and isinstance(args[2], dict):
+            pairs = args[2].items()
         else:
-            args = args[2]
-            if args and args[0] == '\"':
-                second_quote = args.find('\"', 1)
-                att_name = args[1:second_quote]
-                args = args[second_quote + 1:]
+            pairs = [(args[2] if len(args) > 2 else '',
+                      args[3] if len(args) > 3 else '')]
 
-            args = args.partition(' ')
-
-            if not att_name and args[0] != ' ':
-                att_name = args[0]
-            if args[2] and args[2][0] == '\"':
-                att_val = args[2][1:args[2].find('\"', 1)]
-
-            if not att_val and args[2]:
-                att_val = args[2].partition(' ')[0]
-
-            args = [att_name, att_val]
-
-        new_dict = models.storage.all()[key]
-
-        for i, att_name in enumerate(args):
-            if (i % 2 == 0):
-                att_val = args[i + 1]
-                if not att_name:
-                    print("** attribute name missing **")
-                    return
-                if not att_val:
-                    print("** value missing **")
-                    return
-                if att_name in self.types:
+        for att_name, att_val in pairs:
+            if not att_name:
+                print("** attribute name missing **")
+                return
+            if att_val is None or att_val == '':
+                print("** value missing **")
+                return
+            if att_name in self.types:
+                try:
                     att_val = self.types[att_name](att_val)
+                except (TypeError, ValueError):
+                    print("** invalid {}: {} **".format(att_name, att_val))
+                    return
 
-                new_dict.__dict__.update({att_name: att_val})
+            try:
+                setattr(new_dict, att_name, att_val)
+            except (AttributeError, TypeError):
+                # read-only properties (State.cities) and __class__
+                print("** can't update {} **".format(att_name))
+                return
 
         new_dict.save()
 
@@ -344,5 +473,56 @@ class HBNBCommand(cmd.Cmd):
         print("Usage: update <className> <id> <attName> <attVal>\n")
 
 
+class ThreadOutput:
+    """Stand-in for sys.stdout sending what a thread prints to its own
+    buffer while it runs capture(), and the rest to stream"""
+
+    def __init__(self, stream):
+        """Instantiate a ThreadOutput object"""
+        self.stream = stream
+        self.local = threading.local()
+
+    def capture(self, function, *args):
+        """Calls function and returns what it printed"""
+        self.local.buffer = StringIO()
+        try:
+            function(*args)
+            return self.local.buffer.getvalue()
+        finally:
+            self.local.buffer = None
+
+    def write(self, text):
+        """Writes text to the buffer of the thread, or to stream"""
+        buffer = getattr(self.local, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        """Flushes stream"""
+        self.stream.flush()
+
+
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    parser = argparse.ArgumentParser(description="HBNB console")
+    parser.add_argument('--batch', nargs='?', const='-', metavar='SCRIPT',
+                        help="run SCRIPT (or stdin) without prompts, "
+                             "saving once at the end")
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help="run consecutive read commands of the batch "
+                             "in N threads (file storage only)")
+    options = parser.parse_args()
+    if options.batch:
+        if options.batch == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(options.batch) as f:
+                lines = f.read().splitlines()
+        times = HBNBCommand().batch(lines, options.jobs)
+        print("{commands} commands ({reads} reads) in {total:.3f}s: "
+              "parse {parse:.3f}s, run {run:.3f}s, save {save:.3f}s"
+              .format(**times), file=sys.stderr)
+    elif sys.__stdin__.isatty():
+        HBNBCommand().cmdloop()
+    else:
+        # piped scripts save once at the end instead of after every line
+        with models.storage.batch():
+            HBNBCommand().cmdloop()
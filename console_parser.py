@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+"""
+Contains the parser of the console command lines
+
+Every line is scanned once with the compiled patterns below; dict
+arguments are read as JSON, or as Python literals with
+ast.literal_eval, never evaluated.
+"""
+import ast
+import json
+import re
+
+# <class>.<command>(<arguments>)
+DOT = re.compile(r'\s*([^.(\s]*)\.(\w*)\((.*)\)', re.S)
+# one argument of a dot command, followed by its comma if any: a
+# "quoted string" (\" escapes a quote), a {dict} running to the last '}'
+# or a bare word
+TOKEN = re.compile(r'\s*(?:("[^"\\]*(?:\\.[^"\\]*)*)"?|(\{.*\})|([^\s,]+))'
+                   r'\s*,?', re.S)
+# one argument of a plain command line, where only blanks separate words
+WORD = re.compile(r'\s*(?:("[^"\\]*(?:\\.[^"\\]*)*)"?|(\{.*\})|(\S+))\s*',
+                  re.S)
+ESCAPE = re.compile(r'\\(.)', re.S)
+# one term of a query: a "quoted string", a comparison, a comma or a word
+TERM = re.compile(r'\s*(?:"([^"\\]*(?:\\.[^"\\]*)*)"|(!=|<=|>=|=|<|>)|(,)|'
+                  r'([^\s,!=<>"]+))\s*', re.S)
+
+
+def argument(string, literal, word):
+    """Returns the argument of a TOKEN match: a string without its
+    quotes and escapes, a dict (or its text when it holds none) or a
+    word"""
+    if string:
+        string = string[1:]
+        return ESCAPE.sub(r'\1', string) if '\\' in string else string
+    if literal:
+        parsed = literal_dict(literal)
+        return literal if parsed is None else parsed
+    return word
+
+
+def split(text):
+    """Returns the arguments of a plain command line, dict literals as
+    dicts"""
+    if '"' not in text and '{' not in text:
+        return text.split()
+    return [argument(*match) for match in WORD.findall(text)]
+
+
+def literal_dict(text):
+    """Returns the dict written in text as JSON or as a Python literal,
+    or None"""
+    try:
+        value = json.loads(text)
+    except ValueError:
+        try:
+            value = ast.literal_eval(text)
+        except (ValueError, TypeError, SyntaxError, MemoryError,
+                RecursionError):
+            return None
+    return value if isinstance(value, dict) else None
+
+
+def parse_dot(line, commands):
+    """Returns the (plain command line, arguments) of a
+    <class>.<command>(<args>) line whose command is in commands, or None
+
+    The arguments are returned as split() would read them from the plain
+    line, so that the command need not scan them again.
+    """
+    match = DOT.match(line)
+    if match is None or match.group(2) not in commands:
+        return None
+    cls, command, text = match.groups()
+    words = [cls]
+    args = [cls] if cls else []
+    for match in TOKEN.findall(text):
+        string, literal, word = match
+        # a quoted string is copied with its quotes and escapes
+        words.append(string + '"' if string else literal or word)
+        args.append(argument(*match))
+    return command + ' ' + ' '.join(words), args
+
+
+def parse_param(word):
+    """Returns the (key, value) pair of a create key=value parameter, or
+    None when the value is not valid
+
+    A "quoted" value is a string, '_' standing for a space and \\" for a
+    quote; other values are floats when they hold a '.', ints otherwise.
+    """
+    key, sep, value = word.partition('=')
+    if not sep:
+        return None
+    if value[:1] == '"' and value[-1:] == '"':
+        return key, value[1:-1].replace('\\"', '"').replace('_', ' ')
+    try:
+        return key, float(value) if '.' in value else int(value)
+    except ValueError:
+        return None
+
+
+def terms(text):
+    """Returns the (kind, text) pairs of the terms of a query, kind
+    being "string", "op", "," or "word"; raises ValueError on a term
+    that cannot be read"""
+    found = []
+    pos = len(text) - len(text.lstrip())
+    while pos < len(text):
+        match = TERM.match(text, pos)
+        if match is None:
+            raise ValueError("invalid query: {}".format(text[pos:]))
+        string, op, comma, word = match.groups()
+        if string is not None:
+            found.append(('string', ESCAPE.sub(r'\1', string)))
+        elif op:
+            found.append(('op', op))
+        elif comma:
+            found.append((',', comma))
+        else:
+            found.append(('word', word))
+        pos = match.end()
+    return found
+
+
+def parse_query(text):
+    """Returns the (conditions, order_by, limit) of a query such as
+
+        where <attr><op><value> [and ...]
+        [order by <attr> [asc|desc], ...] [limit <n>]
+
+    conditions being (attr, op, value) triples holding the values as
+    written, and order_by names, '-name' sorting in descending order.
+    Every part is optional. Raises ValueError on anything else.
+    """
+    found = terms(text) + [(None, None)] * 3
+    conditions, order_by, limit = [], [], None
+
+    def keyword(i):
+        """Returns the lowercased word at i, or None"""
+        kind, word = found[i]
+        return word.lower() if kind == 'word' else None
+
+    i = 0
+    if keyword(i) == 'where':
+        i += 1
+        while True:
+            (kind, attr), (op, sign), (value, written) = found[i:i + 3]
+            if kind is None:
+                raise ValueError("missing condition")
+            if kind != 'word' or op != 'op' or \
+                    value not in ('word', 'string'):
+                raise ValueError("invalid condition: {}".format(
+                    ' '.join(word for kind, word in found[i:i + 3]
+                             if word is not None)))
+            conditions.append((attr, sign, written))
+            i += 3
+            if keyword(i) != 'and':
+                break
+            i += 1
+    if keyword(i) == 'order' and keyword(i + 1) == 'by':
+        i += 2
+        while True:
+            kind, attr = found[i]
+            if kind != 'word':
+                raise ValueError("invalid order by")
+            i += 1
+            if keyword(i) in ('asc', 'desc'):
+                attr = '-' + attr if keyword(i) == 'desc' else attr
+                i += 1
+            order_by.append(attr)
+            if found[i][0] != ',':
+                break
+            i += 1
+    if keyword(i) == 'limit':
+        kind, value = found[i + 1]
+        if kind != 'word' or not value.isdigit():
+            raise ValueError("invalid limit")
+        limit = int(value)
+        i += 2
+    if found[i][0] is not None:
+        raise ValueError("unexpected {}".format(found[i][1]))
+    return conditions, order_by, limit
@@ -10,7 +10,20 @@ storage_t = os.getenv("HBNB_TYPE_STORAGE")
 if storage_t == "db":
     from models.engine.db_storage import DBStorage
     storage = DBStorage()
+elif storage_t == "column":
+    from models.engine.column_storage import ColumnStorage
+    storage = ColumnStorage()
+elif storage_t == "async_db":
+    from models.engine.async_storage import AsyncDBStorage
+    storage = AsyncDBStorage()
+elif storage_t == "async_file":
+    from models.engine.async_storage import AsyncFileStorage
+    storage = AsyncFileStorage()
 else:
     from models.engine.file_storage import FileStorage
     storage = FileStorage()
-storage.reload()
+
+# async engines are reloaded by the application's event loop:
+# await models.storage.reload()
+if storage_t not in ("async_db", "async_file"):
+    storage.reload()
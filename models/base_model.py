@@ -21,18 +21,26 @@ class BaseModel:
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
+        # a new instance is not in storage yet: skip the dirty hook
+        set_attr = super().__setattr__
         if kwargs:
             for key, value in kwargs.items():
                 if key != "__class__":
-                    if key in ("created_at", "updated_at"):
-                        setattr(self, key, datetime.strptime(
-                            value, "%Y-%m-%dT%H:%M:%S.%f"))
+                    if key in ("created_at", "updated_at") and \
+                            not isinstance(value, datetime):
+                        set_attr(key, datetime.fromisoformat(value))
                     else:
-                        setattr(self, key, value)
+                        set_attr(key, value)
         else:
-            self.id = str(uuid4())
-            self.created_at = datetime.utcnow()
-            self.updated_at = self.created_at
+            set_attr('id', str(uuid4()))
+            set_attr('created_at', datetime.utcnow())
+            set_attr('updated_at', self.created_at)
+
+    def __setattr__(self, name, value):
+        """Sets an attribute and flags the object as changed in storage"""
+        super().__setattr__(name, value)
+        if name[0] != '_':
+            models.storage.touch(self, name)
 
     def __str__(self):
         """String representation of the BaseModel class"""
@@ -40,10 +48,14 @@ class BaseModel:
             self.__class__.__name__, self.id, self.__dict__)
 
     def save(self):
-        """Updates the attribute 'updated_at' with the current datetime"""
+        """Updates the attribute 'updated_at' with the current datetime
+
+        Returns what storage.save() returns, a coroutine to await under
+        the async storage engines.
+        """
         self.updated_at = datetime.utcnow()
         models.storage.new(self)
-        models.storage.save()
+        return models.storage.save()
 
     def to_dict(self):
         """Returns a dictionary containing all keys/values of the instance"""
@@ -61,4 +73,4 @@ class BaseModel:
 
     def delete(self):
         """Delete the current instance from the storage"""
-        models.storage.delete(self)
+        return models.storage.delete(self)
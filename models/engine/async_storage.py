@@ -0,0 +1,197 @@
+#!/usr/bin/python3
+"""
+Contains the classes AsyncFileStorage and AsyncDBStorage
+"""
+
+import asyncio
+from os import getenv
+from models.base_model import Base
+from models.engine.db_storage import DBStorage, classes, strategies
+from models.engine.file_storage import FileStorage, operators
+
+try:
+    from sqlalchemy import func, select
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.ext.asyncio import (async_scoped_session,
+                                        async_sessionmaker,
+                                        create_async_engine)
+except ImportError:
+    create_async_engine = None
+
+drivers = {'sqlite': 'sqlite+aiosqlite', 'mysql': 'mysql+aiomysql'}
+
+
+class AsyncFileStorage:
+    """FileStorage for asyncio code, selected with
+    HBNB_TYPE_STORAGE=async_file
+
+    The objects live in memory, so all(), new() and the other lookups
+    are served as they are; save(), reload() and close() read or write
+    the file in a worker thread, one at a time, so the event loop never
+    blocks on disk.
+    """
+
+    def __init__(self):
+        """Instantiate an AsyncFileStorage object"""
+        self.__storage = FileStorage()
+        self.__lock = None
+
+    def __getattr__(self, name):
+        """Serves the in-memory methods (get, lookup, query, touch...)
+        of the underlying FileStorage"""
+        return getattr(self.__storage, name)
+
+    async def all(self, cls=None):
+        """Returns a dictionary of models currently in storage"""
+        return self.__storage.all(cls)
+
+    def new(self, obj):
+        """Adds new object to storage dictionary"""
+        self.__storage.new(obj)
+
+    async def save(self):
+        """Saves storage dictionary to file in a worker thread and
+        returns the number of objects written"""
+        return await self.__run(self.__storage.save)
+
+    async def delete(self, obj=None):
+        """Delete obj from __objects if it's inside"""
+        self.__storage.delete(obj)
+
+    async def reload(self):
+        """Loads storage dictionary from file in a worker thread"""
+        await self.__run(self.__storage.reload)
+
+    async def close(self):
+        """Reloads the objects from the file"""
+        await self.reload()
+
+    async def __run(self, method):
+        """Runs method in a worker thread, after any earlier one"""
+        if self.__lock is None:
+            self.__lock = asyncio.Lock()
+        async with self.__lock:
+            return await asyncio.to_thread(method)
+
+
+class AsyncDBStorage:
+    """DBStorage for asyncio code on SQLAlchemy's asyncio extension,
+    selected with HBNB_TYPE_STORAGE=async_db
+
+    The URL comes from HBNB_DB_URL or the HBNB_MYSQL_* variables, its
+    driver being swapped for aiosqlite or aiomysql. Every asyncio task
+    gets its own session. Relationships cannot be lazy loaded from a
+    coroutine: pass their names to all(cls, load=...) or query(cls,
+    load=...) instead.
+
+    new() stays synchronous, as on the file engine: adding an object to
+    the session does no I/O, the INSERT being sent by save(). The
+    web_flask apps are WSGI views calling the storage synchronously, so
+    they are not served from this engine (see web_flask/cache.py).
+    """
+
+    def __init__(self):
+        """Instantiate an AsyncDBStorage object"""
+        if create_async_engine is None:
+            raise ImportError("async_db storage needs SQLAlchemy's "
+                              "asyncio extension")
+        url = make_url(getenv('HBNB_DB_URL') or
+                       'mysql://{}:{}@{}/{}'.format(getenv('HBNB_MYSQL_USER'),
+                                                    getenv('HBNB_MYSQL_PWD'),
+                                                    getenv('HBNB_MYSQL_HOST'),
+                                                    getenv('HBNB_MYSQL_DB')))
+        if url.get_driver_name() not in ('aiosqlite', 'aiomysql', 'asyncmy'):
+            url = url.set(drivername=drivers[url.get_backend_name()])
+        self.__engine = create_async_engine(
+            url, pool_pre_ping=getenv('HBNB_DB_POOL_PRE_PING', '1') == '1')
+        self.__session = async_scoped_session(
+            async_sessionmaker(self.__engine, expire_on_commit=False),
+            scopefunc=asyncio.current_task)
+        self.__generation = 0
+
+    async def all(self, cls=None, load=()):
+        """query on the session of the current task, eager loading the
+        relationships named in load (a sequence, or a dict of "selectin"
+        or "joined" like DBStorage.query)"""
+        if not isinstance(load, dict):
+            load = dict.fromkeys(load, "selectin")
+        new_dict = {}
+        for clss in classes:
+            if cls is None or cls is classes[clss] or cls == clss:
+                query = select(classes[clss]).options(
+                    *[strategies[how](getattr(classes[clss], attr))
+                      for attr, how in load.items()])
+                result = await self.__session.execute(query)
+                for obj in result.unique().scalars():
+                    new_dict[clss + '.' + obj.id] = obj
+        return new_dict
+
+    async def get(self, cls, id):
+        """returns the object of cls with the given id, or None"""
+        cls = classes.get(cls, cls)
+        if cls not in classes.values():
+            return None
+        return await self.__session.get(cls, id)
+
+    async def count(self, cls=None, conditions=()):
+        """returns the number of objects of cls, or of every class,
+        passing every (attr, op, value) condition"""
+        total = 0
+        for clss in classes:
+            if cls is None or cls is classes[clss] or cls == clss:
+                result = await self.__session.execute(
+                    select(func.count(classes[clss].id)).where(
+                        *[operators[op](getattr(classes[clss], attr), value)
+                          for attr, op, value in conditions]))
+                total += result.scalar()
+        return total
+
+    async def query(self, cls, conditions=(), order_by=(), limit=None,
+                    offset=None, after=None, columns=None, load=()):
+        """DBStorage.query on the session of the current task"""
+        return await self.__session().run_sync(
+            DBStorage.fetch, cls, conditions, order_by, limit, offset,
+            after, columns, load)
+
+    def generation(self):
+        """returns a number that new(), delete() and save() increase, for
+        caches of what was read to tell when they are stale"""
+        return self.__generation
+
+    def new(self, obj):
+        """add the object to the session of the current task"""
+        self.__session.add(obj)
+        self.__generation += 1
+
+    def touch(self, obj, attr=None):
+        """the session already tracks changed attributes"""
+        pass
+
+    async def save(self):
+        """commit the session of the current task and return the number
+        of objects added, changed or deleted"""
+        session = self.__session()
+        count = len(session.new) + len(session.dirty) + len(session.deleted)
+        await session.commit()
+        if count:
+            self.__generation += 1
+        return count
+
+    async def delete(self, obj=None):
+        """delete from the session of the current task obj if not None"""
+        if obj is not None:
+            await self.__session.delete(obj)
+            self.__generation += 1
+
+    async def reload(self):
+        """creates the tables missing from the database"""
+        async with self.__engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    async def close(self):
+        """closes the session of the current task"""
+        await self.__session.remove()
+
+    async def dispose(self):
+        """closes every pooled connection"""
+        await self.__engine.dispose()
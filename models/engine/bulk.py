@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""
+Contains the helpers used to import and export objects in bulk
+"""
+
+import csv
+import json
+from datetime import datetime
+from uuid import uuid4
+
+
+def read_records(path):
+    """Yields (line number, record) pairs from a JSON-lines or CSV file
+
+    The format is picked from the extension: .csv files need a header
+    line, anything else is read as one JSON object per line.
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except ValueError:
+                        yield number, None
+
+
+def validate(cls, record):
+    """Returns record checked and converted against the columns of cls
+
+    Raises ValueError when an attribute is unknown, a value cannot be
+    converted or a required column is missing.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    columns = cls.__table__.columns
+    name = record.pop('__class__', cls.__name__)
+    if name != cls.__name__:
+        raise ValueError("record of class {}".format(name))
+    row = {}
+    for key, value in record.items():
+        if key in columns:
+            row[key] = convert(columns[key], value)
+        elif key in cls.__dict__ and \
+                not hasattr(type(cls.__dict__[key]), '__get__'):
+            row[key] = value
+        else:
+            raise ValueError("unknown attribute {}".format(key))
+    now = datetime.utcnow()
+    row.setdefault('id', str(uuid4()))
+    row.setdefault('created_at', now)
+    row.setdefault('updated_at', row['created_at'])
+    for column in columns:
+        if row.get(column.key) is not None:
+            continue
+        if column.default is not None and column.default.is_scalar:
+            row[column.key] = column.default.arg
+        elif not column.nullable:
+            raise ValueError("{} is required".format(column.key))
+    return row
+
+
+def convert(column, value):
+    """Converts value to the Python type of column"""
+    if value is None or value == '':
+        return None
+    kind = column.type.python_type
+    if isinstance(value, kind) and not isinstance(value, bool):
+        return value
+    if kind is datetime:
+        kind = datetime.fromisoformat
+    elif kind is int and isinstance(value, float) and \
+            not value.is_integer():
+        raise ValueError("{} must be an integer".format(column.key))
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError("invalid {}: {!r}".format(column.key, value))
+
+
+def validated(cls, records, errors):
+    """Yields the valid records of (line, record) pairs and appends a
+    (line, message) pair to errors for every invalid one"""
+    for line, record in records:
+        try:
+            yield validate(cls, record)
+        except ValueError as e:
+            errors.append((line, str(e)))
@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+"""
+Contains the class ColumnStorage
+"""
+
+import math
+import mmap
+import os
+from array import array
+from models.engine.file_storage import FileStorage, matches, operators
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnStorage(FileStorage):
+    """FileStorage that also keeps the numeric Place columns on disk as
+    memory-mapped typed arrays
+
+    filter() runs comparisons on those columns over the whole table at
+    once (with numpy when it is installed) and only builds the Place
+    instances of the matching rows, reload() keeping the Place records
+    serialized until then. stream(), and with it query() and count(),
+    goes through filter() when a condition is on a mapped column.
+    Numbers are stored as doubles, NaN standing for a missing value, and
+    city_id as an integer code. Review has no numeric column, so it is
+    filtered like any other class.
+    """
+    __column_path = 'file.columns'
+    __numeric = {'Place': ('number_rooms', 'number_bathrooms', 'max_guest',
+                           'price_by_night', 'latitude', 'longitude')}
+    __coded = {'Place': ('city_id',)}
+    lazy_classes = tuple(__numeric)
+
+    def __init__(self):
+        """Instantiate a ColumnStorage object"""
+        super().__init__()
+        self.__tables = {}
+        self.__stale = {name: set() for name in ColumnStorage.__numeric}
+
+    def new(self, obj):
+        """Adds new object to storage dictionary"""
+        super().new(obj)
+        if obj.__class__.__name__ in self.__stale:
+            self.__stale[obj.__class__.__name__].add(obj.id)
+
+    def touch(self, obj, attr=None):
+        """Flags a stored obj as changed since the last save"""
+        super().touch(obj, attr)
+        if obj.__class__.__name__ in self.__stale and 'id' in obj.__dict__:
+            self.__stale[obj.__class__.__name__].add(obj.id)
+
+    def delete(self, obj=None):
+        """Delete obj from __objects if it's inside"""
+        super().delete(obj)
+        if obj is not None and obj.__class__.__name__ in self.__stale:
+            self.__stale[obj.__class__.__name__].add(obj.id)
+
+    def save(self):
+        """Saves storage dictionary to file and refreshes the columns"""
+        count = super().save()
+        if count and any(self.__stale.values()):
+            self.__build()
+        return count
+
+    def reload(self):
+        """Loads storage dictionary from file and maps the columns"""
+        super().reload()
+        self.__build()
+
+    def filter(self, cls, conditions):
+        """Returns the objects of cls matching every (attr, op, value)
+        condition, op being one of =, !=, <, <=, > or >="""
+        name = cls if isinstance(cls, str) else cls.__name__
+        table = self.__tables.get(name)
+        if table is None:
+            return [obj for obj in self.all(cls).values()
+                    if matches(obj, conditions)]
+        rows = self.__scan(table, conditions)
+        stale = self.__stale[name]
+        found = [self.get(name, table['ids'][row]) for row in rows
+                 if table['ids'][row] not in stale]
+        found = [obj for obj in found if obj is not None]
+        for _id in stale:
+            obj = self.get(name, _id)
+            if obj is not None and matches(obj, conditions):
+                found.append(obj)
+        return found
+
+    def stream(self, cls=None, conditions=()):
+        """Yields the objects of cls passing every (attr, op, value)
+        condition, through filter() when one is on a mapped column"""
+        name = getattr(cls, '__name__', cls)
+        table = self.__tables.get(name)
+        if table is not None and any(
+                attr in table['codes'] and op in ('=', '!=') or
+                attr in table['maps'] and isinstance(value, (int, float))
+                for attr, op, value in conditions):
+            yield from self.filter(name, conditions)
+        else:
+            yield from super().stream(cls, conditions)
+
+    def __scan(self, table, conditions):
+        """Returns the row numbers matching the column conditions"""
+        count = len(table['ids'])
+        if numpy is not None:
+            mask = numpy.ones(count, dtype=bool)
+        else:
+            mask = None
+        rest = []
+        for attr, op, value in conditions:
+            if attr in table['codes'] and op in ('=', '!='):
+                value = table['codes'][attr].get(value, -1)
+            elif attr not in table['maps'] or \
+                    not isinstance(value, (int, float)):
+                rest.append((attr, op, value))
+                continue
+            if count == 0:
+                return []
+            test = operators[op]
+            if numpy is not None:
+                column = numpy.frombuffer(table['maps'][attr],
+                                          dtype=table['types'][attr])
+                mask &= test(column, value)
+                if attr in table['codes']:
+                    mask &= column != -1
+                else:
+                    mask &= ~numpy.isnan(column)
+            else:
+                with memoryview(table['maps'][attr]) as view:
+                    column = view.cast(table['types'][attr])
+                    hits = [v == v and v != -1 and test(v, value)
+                            if attr in table['codes'] else
+                            v == v and test(v, value) for v in column]
+                    column.release()
+                mask = hits if mask is None else \
+                    [a and b for a, b in zip(mask, hits)]
+        if mask is None:
+            rows = range(count)
+        elif numpy is not None:
+            rows = numpy.flatnonzero(mask).tolist()
+        else:
+            rows = [row for row, hit in enumerate(mask) if hit]
+        if not rest:
+            return rows
+        return [row for row in rows
+                if matches(self.get(table['name'], table['ids'][row]), rest)]
+
+    def __build(self):
+        """Writes and maps the column files of every columnar class"""
+        os.makedirs(ColumnStorage.__column_path, exist_ok=True)
+        for table in self.__tables.values():
+            for mapped in table['maps'].values():
+                mapped.close()
+        self.__tables = {}
+        for name, numeric in ColumnStorage.__numeric.items():
+            coded = ColumnStorage.__coded.get(name, ())
+            ids = []
+            values = {attr: array('d') for attr in numeric}
+            values.update({attr: array('q') for attr in coded})
+            codes = {attr: {} for attr in coded}
+            for key, record in self.records(name):
+                ids.append(record['id'])
+                for attr in numeric:
+                    val = record.get(attr)
+                    values[attr].append(math.nan if val is None
+                                        else float(val))
+                for attr in coded:
+                    val = record.get(attr)
+                    values[attr].append(
+                        -1 if val is None else
+                        codes[attr].setdefault(val, len(codes[attr])))
+            table = {'name': name, 'ids': ids, 'codes': codes, 'maps': {},
+                     'types': {attr: values[attr].typecode
+                               for attr in values}}
+            for attr, column in values.items():
+                path = os.path.join(ColumnStorage.__column_path,
+                                    '{}.{}'.format(name, attr))
+                with open(path + '.tmp', 'wb') as f:
+                    column.tofile(f)
+                os.replace(path + '.tmp', path)
+                if ids:
+                    with open(path, 'rb') as f:
+                        table['maps'][attr] = mmap.mmap(
+                            f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__tables[name] = table
+            self.__stale[name].clear()
@@ -11,17 +11,67 @@ from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+from models.engine.file_storage import operators, order_keys
 from os import getenv
+import itertools
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import and_, create_engine, event, func, or_
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import joinedload, scoped_session, selectinload
+from sqlalchemy.orm import object_session, sessionmaker
 
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
            "Review": Review, "State": State, "User": User}
 
+strategies = {"joined": joinedload, "selectin": selectinload}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that keeps count of checkouts, of the time spent
+    waiting for a connection and of the checkouts that timed out"""
+
+    def __init__(self, *args, **kwargs):
+        """Instantiate a TimedQueuePool object"""
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.checkouts = self.timeouts = 0
+        self.wait_time = self.max_wait = 0.0
+
+    def _do_get(self):
+        """times every checkout from the queue"""
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self.lock:
+                self.checkouts += 1
+                self.timeouts += timed_out
+                self.wait_time += waited
+                self.max_wait = max(self.max_wait, waited)
+
 
 class DBStorage:
-    """interaacts with the MySQL database"""
+    """interaacts with the MySQL database
+
+    The connection pool is set with HBNB_DB_POOL_SIZE (default 5),
+    HBNB_DB_MAX_OVERFLOW (10), HBNB_DB_POOL_TIMEOUT (30 seconds),
+    HBNB_DB_POOL_RECYCLE (3600 seconds, below MySQL's wait_timeout) and
+    HBNB_DB_POOL_PRE_PING (1 to test connections before using them).
+
+    HBNB_DB_REPLICAS takes a comma-separated list of read replica URLs.
+    all(), query() and stream() then read from the replicas in turn,
+    until the session writes: from then on to close(), its reads stay on
+    the primary so they see its own writes.
+    """
     __engine = None
     __session = None
 
@@ -32,45 +82,293 @@ class DBStorage:
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        url = getenv('HBNB_DB_URL') or \
+            'mysql+mysqldb://{}:{}@{}/{}'.format(HBNB_MYSQL_USER,
+                                                 HBNB_MYSQL_PWD,
+                                                 HBNB_MYSQL_HOST,
+                                                 HBNB_MYSQL_DB)
+        self.__engine = self.__connect(url)
+        replicas = getenv('HBNB_DB_REPLICAS')
+        self.__replicas = [self.__connect(replica.strip())
+                           for replica in replicas.split(',')
+                           if replica.strip()] if replicas else []
+        self.__readers = []
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
+        # batches belong to the thread that opened them, like its session
+        self.__local = threading.local()
+        self.__generation = 0
+        self.__changes = threading.Lock()
+
+    @staticmethod
+    def __connect(url):
+        """creates the engine of url with the pool set by HBNB_DB_POOL_*"""
+        options = {
+            'pool_recycle': int(getenv('HBNB_DB_POOL_RECYCLE', 3600)),
+            'pool_pre_ping': getenv('HBNB_DB_POOL_PRE_PING', '1') == '1'}
+        url = make_url(url)
+        # an in-memory SQLite database only lives on its one connection
+        if url.get_backend_name() != 'sqlite' or \
+                url.database not in (None, '', ':memory:'):
+            options.update(
+                poolclass=TimedQueuePool,
+                pool_size=int(getenv('HBNB_DB_POOL_SIZE', 5)),
+                max_overflow=int(getenv('HBNB_DB_MAX_OVERFLOW', 10)),
+                pool_timeout=float(getenv('HBNB_DB_POOL_TIMEOUT', 30)))
+        return create_engine(url, **options)
 
     def all(self, cls=None):
         """query on the current database session"""
         new_dict = {}
         for clss in classes:
-            if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
-                for obj in objs:
-                    key = obj.__class__.__name__ + '.' + obj.id
-                    new_dict[key] = obj
+            if cls is None or cls is classes[clss] or cls == clss:
+                for obj in self.query(classes[clss]):
+                    new_dict[clss + '.' + obj.id] = obj
         return (new_dict)
 
+    def get(self, cls, id):
+        """returns the object of cls (a class or a class name) with the
+        given id, or None, looking it up by primary key"""
+        cls = classes.get(cls, cls)
+        if cls not in classes.values():
+            return None
+        return self.__reader().get(cls, id)
+
+    def count(self, cls=None, conditions=()):
+        """returns the number of objects of cls, or of every class,
+        passing every (attr, op, value) condition, with one SELECT
+        COUNT(*) per table"""
+        total = 0
+        for clss in classes:
+            if cls is None or cls is classes[clss] or cls == clss:
+                query = self.__reader().query(func.count(classes[clss].id))
+                total += self.__where(query, classes[clss],
+                                      conditions).scalar()
+        return total
+
+    def query(self, cls, conditions=(), order_by=(), limit=None,
+              offset=None, after=None, columns=None, load=()):
+        """returns the objects of cls passing every (attr, op, value)
+        condition, filtering, sorting and paging in SQL
+
+        order_by names the sort attributes ('-name' for descending), id
+        breaking ties; after is the last object (or row of sort values
+        and id) of the previous page, for keyset pagination. With
+        columns, only those attributes are selected and tuples of their
+        values are returned instead of objects.
+
+        load names the relationships to fetch along with the objects,
+        either as a sequence (loaded with one extra SELECT ... IN query
+        each) or as a dict mapping each name to "selectin" or "joined",
+        so that rendering them does not issue one query per object.
+        """
+        return self.fetch(self.__reader(), cls, conditions, order_by, limit,
+                          offset, after, columns, load)
+
+    @staticmethod
+    def fetch(session, cls, conditions=(), order_by=(), limit=None,
+              offset=None, after=None, columns=None, load=()):
+        """runs query() on session, a (sync) session or scoped session;
+        AsyncDBStorage runs it through AsyncSession.run_sync"""
+        query = DBStorage.__select(session, cls, conditions, order_by,
+                                   after, columns,
+                                   limit is not None or offset)
+        if load:
+            if not isinstance(load, dict):
+                load = dict.fromkeys(load, "selectin")
+            cls = classes.get(cls, cls)
+            query = query.options(*[strategies[how](getattr(cls, attr))
+                                    for attr, how in load.items()])
+        rows = query.limit(limit).offset(offset).all()
+        if columns:
+            return [tuple(row) for row in rows]
+        return rows
+
+    def stream(self, cls=None, conditions=(), size=1000):
+        """yields the objects of cls passing every (attr, op, value)
+        condition, fetching them from the server size rows at a time"""
+        for clss in classes:
+            if cls is None or cls is classes[clss] or cls == clss:
+                query = self.__select(self.__reader(), classes[clss],
+                                      conditions)
+                yield from query.yield_per(size)
+
+    def __reader(self):
+        """returns the session reads go through: the next replica's,
+        or the primary's once this session has written"""
+        if not self.__readers or self.__session().info.get('wrote'):
+            return self.__session
+        return next(self.__turn)
+
+    def __changed(self):
+        """increases the number generation() returns"""
+        with self.__changes:
+            self.__generation += 1
+
+    def __written(self):
+        """sends the reads of the current session to the primary"""
+        self.__session().info['wrote'] = True
+
+    def __adopt(self, obj):
+        """detaches obj from the replica session it was read from, so the
+        primary session can write it"""
+        session = object_session(obj)
+        if session is not None and session is not self.__session():
+            session.expunge(obj)
+        return obj
+
+    @staticmethod
+    def __select(session, cls, conditions, order_by=(), after=None,
+                 columns=None, paged=False):
+        """builds the query behind query() and stream()"""
+        cls = classes.get(cls, cls)
+        if columns:
+            query = session.query(*[getattr(cls, attr) for attr in columns])
+        else:
+            query = session.query(cls)
+        query = DBStorage.__where(query, cls, conditions)
+        keys = order_keys(order_by)
+        if keys or after is not None or paged:
+            if 'id' not in (attr for attr, desc in keys):
+                keys.append(('id', False))
+        if after is not None:
+            if not isinstance(after, (tuple, list)):
+                after = [getattr(after, attr) for attr, desc in keys]
+            # (a > x) or (a = x and b > y) or ... for each sort key
+            clauses = []
+            for i, (attr, desc) in enumerate(keys):
+                column = getattr(cls, attr)
+                same = [getattr(cls, a) == after[j]
+                        for j, (a, d) in enumerate(keys[:i])]
+                step = column < after[i] if desc else column > after[i]
+                clauses.append(and_(*same, step))
+            query = query.filter(or_(*clauses))
+        return query.order_by(*[getattr(cls, attr).desc() if desc
+                                else getattr(cls, attr)
+                                for attr, desc in keys])
+
+    @staticmethod
+    def __where(query, cls, conditions):
+        """adds a WHERE clause to query for each (attr, op, value)
+        condition on cls"""
+        for attr, op, value in conditions:
+            query = query.filter(operators[op](getattr(cls, attr), value))
+        return query
+
     def new(self, obj):
         """add the object to the current database session"""
-        self.__session.add(obj)
+        self.__written()
+        self.__session.add(self.__adopt(obj))
+        self.__changed()
+
+    def touch(self, obj, attr=None):
+        """the session already tracks changed attributes"""
+        pass
 
     def save(self):
-        """commit all changes of the current database session"""
-        self.__session.commit()
+        """commit all changes of the current database session
+
+        Returns the number of objects added, changed or deleted; nothing
+        is committed when that number is 0.
+        """
+        if getattr(self.__local, 'batching', 0):
+            self.__local.deferred = True
+            return 0
+        self.__session.flush()
+        info = self.__session().info
+        count = info.get('flushed', 0)
+        if count:
+            self.__session.commit()
+            info['flushed'] = 0
+            self.__changed()
+        return count
+
+    def bulk_insert(self, cls, records, size=1000):
+        """insert validated records of cls with one executemany per chunk
+        of size records; returns the number of rows inserted"""
+        cls = classes.get(cls, cls)
+        columns = [column.key for column in cls.__table__.columns]
+        records = iter(records)
+        count = 0
+        while True:
+            chunk = [{key: record.get(key) for key in columns}
+                     for record in itertools.islice(records, size)]
+            if not chunk:
+                break
+            self.__written()
+            self.__session.execute(cls.__table__.insert(), chunk)
+            count += len(chunk)
+        info = self.__session().info
+        info['flushed'] = info.get('flushed', 0) + count
+        self.save()
+        return count
+
+    @contextmanager
+    def batch(self):
+        """defers every save() made inside the block to a single commit
+        when the outermost batch of the thread exits"""
+        local = self.__local
+        local.batching = getattr(local, 'batching', 0) + 1
+        try:
+            yield self
+        finally:
+            local.batching -= 1
+            if not local.batching and getattr(local, 'deferred', False):
+                local.deferred = False
+                self.save()
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
-            self.__session.delete(obj)
+            self.__written()
+            self.__session.delete(self.__adopt(obj))
+            self.__changed()
 
     def reload(self):
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
         sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        event.listen(sess_factory, 'before_flush', self.__count_flush)
         Session = scoped_session(sess_factory)
         self.__session = Session
+        self.__readers = [scoped_session(sessionmaker(
+            bind=engine, expire_on_commit=False))
+            for engine in self.__replicas]
+        self.__turn = itertools.cycle(self.__readers)
 
     def close(self):
         """call remove() method on the private session attribute"""
         self.__session.remove()
+        for reader in self.__readers:
+            reader.remove()
+
+    def generation(self):
+        """returns a number that new(), delete() and save() increase, for
+        caches of what was read to tell when they are stale; changes made
+        by other processes are not seen"""
+        return self.__generation
+
+    def pool_stats(self):
+        """returns the state of the connection pool: its size, the
+        connections checked in, checked out and in overflow, and for a
+        timed pool the checkouts made, the ones that timed out and the
+        total and longest time spent waiting for a connection (other
+        pools, such as in-memory SQLite's, only report their status)"""
+        pool = self.__engine.pool
+        if not isinstance(pool, QueuePool):
+            return {'pool': pool.status()}
+        stats = {'size': pool.size(), 'checked_in': pool.checkedin(),
+                 'checked_out': pool.checkedout(),
+                 'overflow': pool.overflow()}
+        if isinstance(pool, TimedQueuePool):
+            with pool.lock:
+                stats.update(checkouts=pool.checkouts,
+                             timeouts=pool.timeouts,
+                             wait_time=pool.wait_time,
+                             max_wait=pool.max_wait)
+        return stats
+
+    def __count_flush(self, session, context, instances):
+        """counts the objects written by each flush of the session"""
+        session.info['flushed'] = session.info.get('flushed', 0) + \
+            len(session.new) + len(session.dirty) + len(session.deleted)
@@ -1,35 +1,436 @@
 #!/usr/bin/python3
 """This module defines a class to manage file storage for hbnb clone"""
+import itertools
 import json
+import operator
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from os import getenv
+from models.engine import parallel
+from models.engine.locks import RWLock
+from models.engine.serializers import get_serializer
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+operators = {'=': operator.eq, '!=': operator.ne, '<': operator.lt,
+             '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+
+def matches(obj, conditions):
+    """Tells if obj passes every (attr, op, value) condition, a missing
+    attribute never matching"""
+    for attr, op, value in conditions:
+        current = getattr(obj, attr, None)
+        if current is None or not operators[op](current, value):
+            return False
+    return True
+
+
+def predicate(conditions):
+    """Compiles (attr, op, value) conditions into a function telling if
+    an object passes them all, like matches(); unknown operators raise
+    KeyError here rather than on the first object"""
+    tests = tuple((attr, operators[op], value)
+                  for attr, op, value in conditions)
+
+    def check(obj):
+        """Tells if obj passes the compiled conditions"""
+        for attr, test, value in tests:
+            current = getattr(obj, attr, None)
+            if current is None or not test(current, value):
+                return False
+        return True
+    return check
+
+
+def order_keys(order_by):
+    """Returns the (attr, descending) pairs of an order_by argument, a
+    single name or a sequence of names, '-name' sorting in descending
+    order"""
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    return [(name.lstrip('-'), name.startswith('-')) for name in order_by]
+
+
+def sort_key(value):
+    """Returns the sort key of value, None sorting first like SQL NULLs"""
+    return value is not None, value
+
+
+def follows(values, keys, after):
+    """Tells if the sort values of a row come after the after values"""
+    for (attr, desc), value, last in zip(keys, values, after):
+        if value != last:
+            value, last = sort_key(value), sort_key(last)
+            return value < last if desc else value > last
+    return False
 
 
 class FileStorage:
-    """This class manages storage of hbnb models in JSON format"""
+    """This class manages storage of hbnb models in JSON format
+
+    HBNB_FILE_FORMAT picks the snapshot format: json (file.json, the
+    default), pickle (file.pickle) or msgpack (file.msgpack, when the
+    msgpack package is installed).
+
+    When HBNB_FILE_JOURNAL is set to 1, save() appends the objects added,
+    changed or deleted since the last save to an append-only journal
+    instead of rewriting the whole file. Once the journal grows past
+    HBNB_JOURNAL_LIMIT bytes it is folded into a fresh snapshot by a
+    background thread, and reload() replays the snapshot plus the journal.
+
+    When HBNB_LAZY_LOAD is set to 1, reload() keeps the records in their
+    serialized form and a class is only turned into model instances the
+    first time all(), lookup() or a relationship property asks for it.
+
+    Every thread shares the same objects: changes go through a
+    reader/writer lock, and save() copies the object references under
+    that lock before serializing them, one save at a time, to a
+    temporary file that atomically replaces the old one. all(cls),
+    stream() and query() copy what they return under that lock; the
+    dict returned by all() without a class is the live store.
+
+    When HBNB_FILE_SHARED is set to 1, several processes can share the
+    file: saves hold an exclusive fcntl lock on file.json.lock (reloads a
+    shared one), reads reload the file whenever another process replaced
+    it, and a save first merges the file so the records this process did
+    not change are kept as the other processes wrote them. Shared mode
+    rewrites the snapshot and leaves the journal off.
+
+    When HBNB_FILE_SHARDS is set to N, the objects are kept in a
+    file.json.d directory instead: one file per class (State.json...)
+    when N is 1, or N files per class split on a hash of the id
+    (State.0.json to State.<N-1>.json). save() only rewrites the shards
+    holding changed objects, and reload() reads the shards with
+    HBNB_RELOAD_WORKERS threads. HBNB_FILE_CLASSES, a comma-separated
+    list of class names, restricts reload() to the shards of those
+    classes; a shard that was not loaded is read before it is written.
+    An existing file.json, or shards of another layout, are moved to
+    the current layout by the next save. Sharding turns off the journal
+    and the shared mode.
+
+    When HBNB_RELOAD_PROCESSES is set to N > 1, reload() splits a JSON
+    snapshot into chunks that N worker processes decode and check, the
+    main process only building the instances.
+    """
     __file_path = 'file.json'
+    __journal_path = 'file.json.journal'
+    __journal_limit = 4 * 1024 * 1024
     __objects = {}
+    __classes = {}
+    __raw = {}
+    __models = {}
+    __relations = {'City': {'state_id': {}},
+                   'Place': {'city_id': {}, 'user_id': {}},
+                   'Review': {'place_id': {}, 'user_id': {}}}
+    __links = {}
+    __dirty = {}
+    __generation = 0
+    __lock = RWLock()
+    __saving = threading.RLock()
+    # names of the classes reload() always keeps serialized, as
+    # HBNB_LAZY_LOAD does for every class
+    lazy_classes = ()
+
+    def __init__(self):
+        """Instantiate a FileStorage object"""
+        self.__format = get_serializer(getenv('HBNB_FILE_FORMAT', 'json'))
+        if self.__format.name != 'json':
+            self.__file_path = 'file.' + self.__format.name
+            self.__journal_path = self.__file_path + '.journal'
+        self.__shards = int(getenv('HBNB_FILE_SHARDS', 0))
+        self.__shard_dir = self.__file_path + '.d'
+        self.__only = set(filter(None,
+                                 getenv('HBNB_FILE_CLASSES', '').split(',')))
+        self.__workers = int(getenv('HBNB_RELOAD_WORKERS',
+                                    min(8, os.cpu_count() or 1)))
+        self.__processes = int(getenv('HBNB_RELOAD_PROCESSES', 0))
+        self.__loaded = set()
+        self.__pending = set()
+        self.__legacy = []
+        self.__shared = getenv('HBNB_FILE_SHARED') == '1' and \
+            not self.__shards
+        self.__journal = getenv('HBNB_FILE_JOURNAL') == '1' and \
+            not self.__shared and not self.__shards
+        self.__seen = None
+        self.__reloaded = None
+        self.__lazy = getenv('HBNB_LAZY_LOAD') == '1'
+        self.__limit = int(getenv('HBNB_JOURNAL_LIMIT',
+                                  FileStorage.__journal_limit))
+        self.__compactor = None
+        self.__stats = {}
+        # batches belong to the thread that opened them
+        self.__local = threading.local()
 
     def all(self, cls=None):
-        """Returns a dictionary of models currently in storage"""
+        """Returns a dictionary of models currently in storage
+
+        With cls (a class or a class name), returns a copy of the
+        per-class index instead of scanning every stored object.
+        """
+        if self.__shared:
+            self.refresh()
+        if FileStorage.__raw:
+            with FileStorage.__lock.write():
+                self.__hydrate(cls)
         if cls is None:
             return FileStorage.__objects
-        filtered_objects = {}
-        for key, obj in FileStorage.__objects.items():
-            if isinstance(obj, cls):
-                filtered_objects[key] = obj
+        self.__check()
+        with FileStorage.__lock.read():
+            filtered_objects = {}
+            for kind, objs in FileStorage.__classes.items():
+                if self.__matches(kind, cls):
+                    filtered_objects.update(objs)
         return filtered_objects
 
+    def get(self, cls, id):
+        """Returns the object of cls with the given id, or None
+
+        Under lazy hydration only that one record is built.
+        """
+        if self.__shared:
+            self.refresh()
+        name = cls if isinstance(cls, str) else cls.__name__
+        key = name + '.' + id
+        if key in FileStorage.__raw.get(name, ()):
+            with FileStorage.__lock.write():
+                val = FileStorage.__raw.get(name, {}).pop(key, None)
+                if val is not None:
+                    self.__put(key, FileStorage.__models[name](**val))
+        return FileStorage.__objects.get(key)
+
+    def count(self, cls=None, conditions=()):
+        """Returns the number of objects of cls (a class or a class
+        name), from the sizes of the class indexes, or of those passing
+        every (attr, op, value) condition"""
+        if conditions:
+            return sum(1 for obj in self.stream(cls, conditions))
+        if self.__shared:
+            self.refresh()
+        self.__check()
+        with FileStorage.__lock.read():
+            return sum(len(objs) for kind, objs
+                       in FileStorage.__classes.items()
+                       if self.__matches(kind, cls)) + \
+                sum(len(records) for name, records
+                    in FileStorage.__raw.items()
+                    if self.__matches(FileStorage.__models[name], cls))
+
+    def generation(self):
+        """Returns a number that new(), delete(), save() and the reloads
+        finding other data on disk increase, for caches of what was read
+        from storage to tell when they are stale"""
+        if self.__shared:
+            self.refresh()
+        return FileStorage.__generation
+
+    def records(self, cls=None):
+        """Yields the (key, record) pairs of cls without building the
+        records that were never turned into instances"""
+        if self.__shared:
+            self.refresh()
+        self.__check()
+        with FileStorage.__lock.read():
+            raw, objs = self.__copy(cls)
+        for items in raw:
+            yield from items
+        for items in objs:
+            for key, obj in items:
+                yield key, obj.to_dict()
+
+    def stream(self, cls=None, conditions=()):
+        """Yields the objects of cls passing every (attr, op, value)
+        condition one at a time
+
+        Records that were never built are turned into throwaway instances
+        that are not kept in storage, so memory stays flat under lazy
+        hydration. An equality condition on an indexed foreign key (see
+        lookup) only visits the objects the reverse index holds for it.
+        """
+        if self.__shared:
+            self.refresh()
+        self.__check()
+        test = predicate(conditions)
+        with FileStorage.__lock.read():
+            attr, value, indexed = self.__indexed(cls, conditions)
+            raw, objs = self.__copy(cls, indexed is None)
+            if indexed is not None:
+                objs = [list(indexed.items())]
+        for items in raw:
+            for key, record in items:
+                if attr is not None and record.get(attr) != value:
+                    continue
+                obj = FileStorage.__models[record['__class__']](**record)
+                if test(obj):
+                    yield obj
+        for items in objs:
+            for key, obj in items:
+                if test(obj):
+                    yield obj
+
+    def query(self, cls, conditions=(), order_by=(), limit=None,
+              offset=None, after=None, columns=None, load=()):
+        """Returns the objects of cls passing every (attr, op, value)
+        condition, sorted and paged the same way as DBStorage.query
+
+        order_by names the sort attributes ('-name' for descending), id
+        breaking ties; after is the last object (or row of sort values
+        and id) of the previous page, for keyset pagination. With
+        columns, tuples of those attribute values are returned instead
+        of objects. load is accepted for DBStorage compatibility: the
+        relationship properties are already served from the index.
+        """
+        keys = order_keys(order_by)
+        if keys or after is not None or limit is not None or offset:
+            if 'id' not in (attr for attr, desc in keys):
+                keys.append(('id', False))
+        found = list(self.stream(cls, conditions))
+        for attr, desc in reversed(keys):
+            found.sort(key=lambda obj: sort_key(getattr(obj, attr, None)),
+                       reverse=desc)
+        if after is not None:
+            if not isinstance(after, (tuple, list)):
+                after = [getattr(after, attr, None) for attr, desc in keys]
+            found = [obj for obj in found if follows(
+                [getattr(obj, attr, None) for attr, desc in keys], keys,
+                after)]
+        start = offset or 0
+        found = found[start:None if limit is None else start + limit]
+        if columns:
+            return [tuple(getattr(obj, attr, None) for attr in columns)
+                    for obj in found]
+        return found
+
+    def lookup(self, cls, attr, value):
+        """Returns the objects of cls whose attr equals value
+
+        Foreign keys such as City.state_id or Review.place_id are served
+        from a reverse index kept current by new, delete and reload.
+        """
+        if self.__shared:
+            self.refresh()
+        if FileStorage.__raw:
+            with FileStorage.__lock.write():
+                self.__hydrate(cls)
+        name = cls if isinstance(cls, str) else cls.__name__
+        index = FileStorage.__relations.get(name, {}).get(attr)
+        if index is None:
+            return [obj for obj in self.stream(cls)
+                    if getattr(obj, attr, None) == value]
+        with FileStorage.__lock.read():
+            return list(index.get(value, {}).values())
+
     def new(self, obj):
         """Adds new object to storage dictionary"""
-        self.all().update({obj.to_dict()['__class__'] + '.' + obj.id: obj})
+        key = obj.__class__.__name__ + '.' + obj.id
+        with FileStorage.__lock.write():
+            FileStorage.__raw.get(obj.__class__.__name__, {}).pop(key, None)
+            self.__put(key, obj)
+            FileStorage.__dirty[key] = obj
+            FileStorage.__generation += 1
+
+    def touch(self, obj, attr=None):
+        """Flags a stored obj as changed since the last save
+
+        Called by BaseModel whenever one of its attributes is set.
+        """
+        _id = obj.__dict__.get('id')
+        if _id is None:
+            return
+        key = obj.__class__.__name__ + '.' + _id
+        relation = attr in FileStorage.__relations.get(
+            obj.__class__.__name__, ())
+        if FileStorage.__objects.get(key) is not obj or \
+                (not relation and FileStorage.__dirty.get(key) is obj):
+            return
+        with FileStorage.__lock.write():
+            if FileStorage.__objects.get(key) is obj:
+                FileStorage.__dirty[key] = obj
+                if relation:
+                    self.__link(key, obj)
 
     def save(self):
-        """Saves storage dictionary to file"""
-        with open(FileStorage.__file_path, 'w') as f:
-            temp = {}
-            temp.update(FileStorage.__objects)
-            for key, val in temp.items():
-                temp[key] = val.to_dict()
-            json.dump(temp, f)
+        """Saves storage dictionary to file
+
+        Returns the number of objects changed or deleted since the last
+        save. In journal mode only those objects are written.
+        """
+        if getattr(self.__local, 'batching', 0):
+            self.__local.deferred = True
+            return 0
+        with FileStorage.__saving:
+            with FileStorage.__lock.write():
+                FileStorage.__generation += 1
+            # the files written hold what is in memory, so the next
+            # reload need not move the generation again; an append only
+            # does when the journal held nothing unread
+            current = not self.__journal or \
+                self.__stored() == self.__reloaded
+            if self.__journal:
+                count = self.__append()
+            elif self.__shards:
+                count = self.__save_shards()
+            else:
+                count = self.__save_file()
+            if current:
+                self.__reloaded = self.__stored()
+            return count
+
+    def refresh(self):
+        """Reloads the file if another process replaced it since this
+        one last read or wrote it; returns True when it did
+
+        Objects changed here and not saved yet are kept, objects deleted
+        from the file by another process are dropped.
+        """
+        if self.__signature() == self.__seen:
+            return False
+        with FileStorage.__saving, self.__flock(False):
+            if self.__signature() == self.__seen:
+                return False
+            self.__merge()
+        return True
+
+    def bulk_insert(self, cls, records):
+        """Builds an instance of cls from each validated record and saves
+        them all at once; returns the number of objects inserted"""
+        cls = FileStorage.__models.get(cls, cls)
+        count = 0
+        with self.batch():
+            for record in records:
+                self.new(cls(**record))
+                count += 1
+            self.save()
+        return count
+
+    @contextmanager
+    def batch(self):
+        """Defers every save() made inside the block to a single save
+        when the outermost batch of the thread exits"""
+        local = self.__local
+        local.batching = getattr(local, 'batching', 0) + 1
+        try:
+            yield self
+        finally:
+            local.batching -= 1
+            if not local.batching and getattr(local, 'deferred', False):
+                local.deferred = False
+                self.save()
 
     def reload(self):
         """Loads storage dictionary from file"""
@@ -46,19 +447,486 @@ class FileStorage:
             'State': State, 'City': City, 'Amenity': Amenity,
             'Review': Review
         }
-        try:
-            temp = {}
-            with open(FileStorage.__file_path, 'r') as f:
-                temp = json.load(f)
-                for key, val in temp.items():
-                    self.all()[key] = classes[val['__class__']](**val)
-        except FileNotFoundError:
-            pass
+        FileStorage.__models.update(classes)
+        start = time.perf_counter()
+        count = 0
+        mode = 'rb' if self.__format.binary else 'r'
+        with FileStorage.__saving, self.__flock(False), \
+                FileStorage.__lock.write():
+            self.__wait()
+            stored = self.__stored()
+            if stored != self.__reloaded:
+                FileStorage.__generation += 1
+            self.__reloaded = stored
+            self.__seen = self.__signature()
+            if self.__shards:
+                count = self.__reload_shards()
+            else:
+                try:
+                    if self.__processes > 1 and parallel.available() and \
+                            self.__format.name == 'json':
+                        for key, val in parallel.load(self.__file_path,
+                                                      self.__processes,
+                                                      classes):
+                            self.__load(key, val)
+                            count += 1
+                    else:
+                        with open(self.__file_path, mode) as f:
+                            for key, val in self.__format.load(f):
+                                self.__load(key, val)
+                                count += 1
+                except FileNotFoundError:
+                    pass
+            for path in (self.__journal_path + '.old', self.__journal_path):
+                for key, val in self.__replay(path):
+                    self.__load(key, val)
+                    count += 1
+        if tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+        elif resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform != 'darwin':
+                peak *= 1024
+        else:
+            peak = None
+        self.__stats = {'records': count,
+                        'seconds': time.perf_counter() - start,
+                        'peak_memory': peak}
+
+    def close(self):
+        """Reloads the objects from the file (in shared mode, only when
+        another process changed it)"""
+        if self.__shared:
+            self.refresh()
+        else:
+            self.reload()
+
+    def reload_stats(self):
+        """Returns the record count, duration and peak memory of the
+        last reload (peak memory in bytes, from tracemalloc when it is
+        tracing and the process high-water mark otherwise)"""
+        return dict(self.__stats)
 
     def delete(self, obj=None):
         """Delete obj from __objects if it's inside"""
         if obj is None:
             return
         key = obj.__class__.__name__ + '.' + obj.id
-        if key in FileStorage.__objects:
-            del FileStorage.__objects[key]
+        with FileStorage.__lock.write():
+            raw = FileStorage.__raw.get(obj.__class__.__name__, {})
+            if key in FileStorage.__objects or \
+                    raw.pop(key, None) is not None:
+                self.__drop(key)
+                FileStorage.__dirty[key] = None
+                FileStorage.__generation += 1
+
+    def __load(self, key, val):
+        """Stores a record read from disk, or drops key if val is None"""
+        FileStorage.__dirty.pop(key, None)
+        if val is None:
+            self.__drop(key)
+            for records in FileStorage.__raw.values():
+                records.pop(key, None)
+            return
+        cls = FileStorage.__models[val['__class__']]
+        if self.__lazy or cls.__name__ in self.lazy_classes:
+            self.__drop(key)
+            FileStorage.__raw.setdefault(cls.__name__, {})[key] = val
+        else:
+            self.__put(key, cls(**val))
+
+    def __check(self):
+        """Rebuilds the class index if __objects was edited directly"""
+        if sum(map(len, FileStorage.__classes.values())) != \
+                len(FileStorage.__objects):
+            with FileStorage.__lock.write():
+                if sum(map(len, FileStorage.__classes.values())) != \
+                        len(FileStorage.__objects):
+                    self.__reindex()
+
+    def __copy(self, cls, objects=True):
+        """Returns lists of the (key, record) pairs never built and of
+        the (key, object) pairs of cls (unless objects is False), to
+        iterate outside the lock"""
+        raw = [list(records.items())
+               for name, records in FileStorage.__raw.items()
+               if self.__matches(FileStorage.__models[name], cls)]
+        objs = [list(objs.items())
+                for kind, objs in FileStorage.__classes.items()
+                if objects and self.__matches(kind, cls)]
+        return raw, objs
+
+    @staticmethod
+    def __indexed(cls, conditions):
+        """Returns the (attr, value, objects) of the first equality
+        condition on a foreign key of cls the reverse index holds,
+        objects being its bucket, or (None, None, None)"""
+        if isinstance(cls, str):
+            name = cls
+        elif cls is not None and not cls.__subclasses__():
+            name = cls.__name__
+        else:
+            return None, None, None
+        relations = FileStorage.__relations.get(name, {})
+        for attr, op, value in conditions:
+            if op == '=' and attr in relations:
+                return attr, value, relations[attr].get(value, {})
+        return None, None, None
+
+    def __shard(self, key):
+        """Returns the (class name, bucket) shard holding key"""
+        name, _id = key.split('.', 1)
+        if self.__shards == 1:
+            return name, None
+        return name, zlib.crc32(_id.encode()) % self.__shards
+
+    def __shard_path(self, shard):
+        """Returns the path of the file of shard"""
+        name, bucket = shard
+        stem = name if bucket is None else '{}.{}'.format(name, bucket)
+        return os.path.join(self.__shard_dir,
+                            stem + '.' + self.__format.name)
+
+    def __parse_shard(self, stem):
+        """Returns the shard of a file name without its extension, or
+        None when the file belongs to another layout"""
+        parts = stem.split('.')
+        if self.__shards == 1:
+            return (parts[0], None) if len(parts) == 1 else None
+        if len(parts) == 2 and parts[1].isdigit() and \
+                int(parts[1]) < self.__shards:
+            return parts[0], int(parts[1])
+        return None
+
+    def __read(self, path):
+        """Returns the (key, record) pairs of the file at path"""
+        with open(path, 'rb' if self.__format.binary else 'r') as f:
+            return list(self.__format.load(f))
+
+    def __reload_shards(self):
+        """Loads the shards of the allowed classes, several files being
+        read at once, and returns the number of records loaded"""
+        paths = []
+        if os.path.exists(self.__file_path):
+            paths.append((self.__file_path, None))
+        try:
+            names = sorted(os.listdir(self.__shard_dir))
+        except FileNotFoundError:
+            names = []
+        ext = '.' + self.__format.name
+        for name in names:
+            if name.endswith(ext) and (not self.__only or
+                                       name.split('.')[0] in self.__only):
+                paths.append((os.path.join(self.__shard_dir, name),
+                              self.__parse_shard(name[:-len(ext)])))
+        count = 0
+        with ThreadPoolExecutor(max(1, self.__workers)) as pool:
+            loaded = pool.map(self.__read, [path for path, shard in paths])
+            for (path, shard), records in zip(paths, loaded):
+                for key, val in records:
+                    self.__load(key, val)
+                    if shard is None:
+                        self.__pending.add(self.__shard(key))
+                count += len(records)
+                if shard is None:
+                    self.__legacy.append(path)
+                else:
+                    self.__loaded.add(shard)
+        return count
+
+    def __save_file(self):
+        """Rewrites the whole file and returns how many objects changed"""
+        self.__wait()
+        with self.__flock(True):
+            if self.__shared and self.__signature() != self.__seen:
+                self.__merge()
+            with FileStorage.__lock.write():
+                objects = list(FileStorage.__objects.items())
+                raw = list(self.__raw_items())
+                dirty = FileStorage.__dirty.copy()
+                FileStorage.__dirty.clear()
+            try:
+                self.__write(self.__file_path, objects, raw)
+            except BaseException:
+                self.__restore(dirty)
+                raise
+            self.__seen = self.__signature()
+        for path in (self.__journal_path, self.__journal_path + '.old'):
+            if os.path.exists(path):
+                os.remove(path)
+        return len(dirty)
+
+    def __save_shards(self):
+        """Rewrites the shards holding changed objects and returns how
+        many objects changed"""
+        self.__check()
+        with FileStorage.__lock.write():
+            dirty = FileStorage.__dirty.copy()
+            FileStorage.__dirty.clear()
+        shards = {self.__shard(key) for key in dirty} | self.__pending
+        try:
+            os.makedirs(self.__shard_dir, exist_ok=True)
+            with FileStorage.__lock.write():
+                for shard in shards - self.__loaded:
+                    path = self.__shard_path(shard)
+                    if os.path.exists(path):
+                        for key, val in self.__read(path):
+                            if key not in dirty and \
+                                    key not in FileStorage.__dirty:
+                                self.__load(key, val)
+                    self.__loaded.add(shard)
+                contents = self.__gather(shards)
+            for shard, (objects, raw) in contents.items():
+                path = self.__shard_path(shard)
+                if objects or raw:
+                    self.__write(path, objects, raw)
+                elif os.path.exists(path):
+                    os.remove(path)
+        except BaseException:
+            self.__restore(dirty)
+            raise
+        self.__pending.clear()
+        for path in self.__legacy:
+            os.remove(path)
+        self.__legacy = []
+        return len(dirty)
+
+    def __gather(self, shards):
+        """Returns the objects and raw records of each shard"""
+        names = {name for name, bucket in shards}
+        contents = {shard: ([], []) for shard in shards}
+        for kind, objs in FileStorage.__classes.items():
+            if kind.__name__ in names:
+                for key, obj in objs.items():
+                    shard = self.__shard(key)
+                    if shard in contents:
+                        contents[shard][0].append((key, obj))
+        for name in names:
+            for key, val in FileStorage.__raw.get(name, {}).items():
+                shard = self.__shard(key)
+                if shard in contents:
+                    contents[shard][1].append((key, val))
+        return contents
+
+    @contextmanager
+    def __flock(self, exclusive):
+        """Holds the lock file of a shared storage during the block"""
+        if not self.__shared or fcntl is None:
+            yield
+            return
+        with open(self.__file_path + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def __signature(self, path=None):
+        """Returns what changes when the file (or the file at path) is
+        replaced or appended to, or None"""
+        try:
+            st = os.stat(path or self.__file_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def __stored(self):
+        """Returns the signatures of every file reload() reads: the
+        snapshot, the journals and the shards"""
+        paths = [self.__file_path, self.__journal_path + '.old',
+                 self.__journal_path]
+        if self.__shards:
+            try:
+                paths += [os.path.join(self.__shard_dir, name) for name in
+                          sorted(os.listdir(self.__shard_dir))]
+            except FileNotFoundError:
+                pass
+        return [(path, self.__signature(path)) for path in paths]
+
+    def __merge(self):
+        """Makes the file the stored state, except for the changes not
+        saved yet; called with the lock file held"""
+        signature = self.__signature()
+        found = set()
+        mode = 'rb' if self.__format.binary else 'r'
+        with FileStorage.__lock.write():
+            try:
+                with open(self.__file_path, mode) as f:
+                    for key, val in self.__format.load(f):
+                        found.add(key)
+                        if key not in FileStorage.__dirty:
+                            self.__load(key, val)
+            except FileNotFoundError:
+                pass
+            for key in list(FileStorage.__objects):
+                if key not in found and key not in FileStorage.__dirty:
+                    self.__drop(key)
+            for records in FileStorage.__raw.values():
+                for key in [key for key in records if key not in found]:
+                    del records[key]
+            FileStorage.__generation += 1
+        self.__seen = signature
+        self.__reloaded = self.__stored()
+
+    @staticmethod
+    def __restore(dirty):
+        """Flags again the changes of a save that failed, unless they
+        were changed since"""
+        with FileStorage.__lock.write():
+            for key, obj in dirty.items():
+                FileStorage.__dirty.setdefault(key, obj)
+
+    def __hydrate(self, cls=None):
+        """Builds the instances of the raw records matching cls"""
+        for name in list(FileStorage.__raw):
+            kind = FileStorage.__models[name]
+            if self.__matches(kind, cls):
+                for key, val in FileStorage.__raw.pop(name).items():
+                    self.__put(key, kind(**val))
+
+    @staticmethod
+    def __matches(kind, cls):
+        """Tells if instances of kind belong in all(cls)"""
+        if cls is None:
+            return True
+        if isinstance(cls, str):
+            return kind.__name__ == cls
+        return issubclass(kind, cls)
+
+    @staticmethod
+    def __put(key, obj):
+        """Stores obj under key and in its class index"""
+        old = FileStorage.__objects.get(key)
+        if old is not None and type(old) is not type(obj):
+            FileStorage.__classes.get(type(old), {}).pop(key, None)
+        FileStorage.__objects[key] = obj
+        FileStorage.__classes.setdefault(type(obj), {})[key] = obj
+        FileStorage.__link(key, obj)
+
+    @staticmethod
+    def __reindex():
+        """Rebuilds the class index after __objects was edited directly"""
+        for objs in FileStorage.__classes.values():
+            objs.clear()
+        for key in list(FileStorage.__links):
+            FileStorage.__unlink(key)
+        for key, obj in FileStorage.__objects.items():
+            FileStorage.__classes.setdefault(type(obj), {})[key] = obj
+            FileStorage.__link(key, obj)
+
+    @staticmethod
+    def __drop(key):
+        """Removes key from storage and from its class index"""
+        obj = FileStorage.__objects.pop(key, None)
+        if obj is not None:
+            FileStorage.__classes.get(type(obj), {}).pop(key, None)
+        FileStorage.__unlink(key)
+
+    @staticmethod
+    def __link(key, obj):
+        """Indexes the foreign keys of obj in the reverse indexes"""
+        FileStorage.__unlink(key)
+        links = []
+        for attr, index in FileStorage.__relations.get(
+                type(obj).__name__, {}).items():
+            value = getattr(obj, attr, None)
+            if value is not None:
+                index.setdefault(value, {})[key] = obj
+                links.append((index, value))
+        if links:
+            FileStorage.__links[key] = links
+
+    @staticmethod
+    def __unlink(key):
+        """Removes key from the reverse indexes"""
+        for index, value in FileStorage.__links.pop(key, ()):
+            objs = index.get(value, {})
+            objs.pop(key, None)
+            if not objs:
+                index.pop(value, None)
+
+    def __append(self):
+        """Appends the pending changes to the journal and returns how
+        many there were"""
+        path = self.__journal_path
+        with FileStorage.__lock.write():
+            dirty = FileStorage.__dirty.copy()
+            FileStorage.__dirty.clear()
+        if dirty:
+            try:
+                with open(path, 'a') as f:
+                    for key, obj in dirty.items():
+                        val = obj.to_dict() if obj is not None else None
+                        f.write(json.dumps([key, val]) + '\n')
+            except BaseException:
+                self.__restore(dirty)
+                raise
+        if os.path.exists(path) and os.path.getsize(path) >= self.__limit:
+            self.__compact()
+        return len(dirty)
+
+    def __compact(self):
+        """Folds the journal into a new snapshot in a background thread"""
+        if self.__compactor is not None and self.__compactor.is_alive():
+            return
+        old = self.__journal_path + '.old'
+        if os.path.exists(old):
+            with open(self.__journal_path, 'r') as src, \
+                    open(old, 'a') as dst:
+                dst.write(src.read())
+            os.remove(self.__journal_path)
+        else:
+            os.replace(self.__journal_path, old)
+        with FileStorage.__lock.read():
+            objects = list(FileStorage.__objects.items())
+            raw = list(self.__raw_items())
+        self.__compactor = threading.Thread(target=self.__snapshot,
+                                            args=(objects, raw, old))
+        self.__compactor.start()
+
+    def __snapshot(self, objects, raw, old):
+        """Writes objects to the snapshot file and drops the old journal"""
+        self.__write(self.__file_path, objects, raw)
+        os.remove(old)
+
+    def __write(self, path, objects, raw):
+        """Writes a snapshot of objects and raw records to a temporary
+        file that then replaces path, so readers of path never see a
+        partial snapshot"""
+        record = self.__format.record
+        records = ((key, record(obj)) for key, obj in objects)
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            with open(tmp, 'wb' if self.__format.binary else 'w') as f:
+                self.__format.dump(itertools.chain(raw, records), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @staticmethod
+    def __raw_items():
+        """Yields the (key, record) pairs that were never built"""
+        for records in FileStorage.__raw.values():
+            yield from records.items()
+
+    def __wait(self):
+        """Waits for a running compaction to finish"""
+        if self.__compactor is not None:
+            self.__compactor.join()
+            self.__compactor = None
+
+    @staticmethod
+    def __replay(path):
+        """Yields the (key, record) entries of a journal file"""
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break
+                    yield json.loads(line)
+        except FileNotFoundError:
+            return
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""
+Contains the class RWLock
+"""
+
+import threading
+
+
+class RWLock:
+    """Reader/writer lock: any number of threads can hold it for reading,
+    or a single thread for writing
+
+    Waiting writers go before new readers so a steady stream of reads
+    cannot starve them. Both sides are reentrant, and a thread holding
+    the write lock may also read, but a reader cannot upgrade to a
+    writer: that would deadlock against another upgrading reader.
+
+    Usage: with lock.read(): ... / with lock.write(): ...
+    """
+
+    def __init__(self):
+        """Instantiate a RWLock object"""
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__depth = 0
+        self.__waiting = 0
+        self.__local = threading.local()
+        self.__read = _Hold(self.acquire_read, self.release_read)
+        self.__write = _Hold(self.acquire_write, self.release_write)
+
+    def read(self):
+        """Returns a context manager holding the lock for reading"""
+        return self.__read
+
+    def write(self):
+        """Returns a context manager holding the lock for writing"""
+        return self.__write
+
+    def acquire_read(self):
+        """Waits until no thread writes or waits to write"""
+        local = self.__local
+        depth = getattr(local, 'depth', 0)
+        if depth or self.__writer == threading.get_ident():
+            local.depth = depth + 1
+            return
+        with self.__cond:
+            while self.__writer is not None or self.__waiting:
+                self.__cond.wait()
+            self.__readers += 1
+        local.depth = 1
+
+    def release_read(self):
+        """Releases one level of read locking"""
+        local = self.__local
+        local.depth -= 1
+        if local.depth or self.__writer == threading.get_ident():
+            return
+        with self.__cond:
+            self.__readers -= 1
+            if not self.__readers:
+                self.__cond.notify_all()
+
+    def acquire_write(self):
+        """Waits until no other thread reads or writes"""
+        me = threading.get_ident()
+        if self.__writer == me:
+            self.__depth += 1
+            return
+        if getattr(self.__local, 'depth', 0):
+            raise RuntimeError("cannot upgrade a read lock to a write lock")
+        with self.__cond:
+            self.__waiting += 1
+            try:
+                while self.__writer is not None or self.__readers:
+                    self.__cond.wait()
+            finally:
+                self.__waiting -= 1
+            self.__writer = me
+
+    def release_write(self):
+        """Releases one level of write locking"""
+        if self.__depth:
+            self.__depth -= 1
+            return
+        with self.__cond:
+            self.__writer = None
+            self.__cond.notify_all()
+
+
+class _Hold:
+    """Context manager calling acquire on entry and release on exit"""
+    __slots__ = ('__enter', '__exit')
+
+    def __init__(self, acquire, release):
+        """Instantiate a _Hold object"""
+        self.__enter = acquire
+        self.__exit = release
+
+    def __enter__(self):
+        """Acquires the lock"""
+        self.__enter()
+
+    def __exit__(self, *exc):
+        """Releases the lock"""
+        self.__exit()
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Contains the helpers FileStorage uses to decode a JSON snapshot in
+several worker processes
+
+The workers run snapshot_decoder.decode, which lives outside the models
+package: the pool pickles it by reference, and importing anything from
+models would wait for the models package to finish its own import,
+which is where the first reload runs.
+"""
+
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from snapshot_decoder import decode
+
+
+def available():
+    """Tells if worker processes can be started from this process
+
+    Workers do not start workers of their own: with the spawn method
+    they import models, whose storage reloads at import time.
+    """
+    return multiprocessing.parent_process() is None
+
+
+def chunks(path, count):
+    """Returns about count (start, end) byte ranges of the file at path,
+    each ending on a line boundary"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, count):
+            f.seek(max(size * i // count, bounds[-1]))
+            f.readline()
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:])
+            if start < end]
+
+
+def load(path, processes, names):
+    """Yields the (key, record) pairs of the JSON snapshot at path,
+    decoded by processes worker processes in file order
+
+    names are the class names a record may have.
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError("Expecting '{' at the start of the file")
+    ranges = chunks(path, processes * 4)
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        'fork' if 'fork' in methods else None)
+    with ProcessPoolExecutor(processes, mp_context=context) as pool:
+        decoded = pool.map(decode, itertools.repeat(path),
+                           [start for start, end in ranges],
+                           [end for start, end in ranges],
+                           itertools.repeat(frozenset(names)))
+        for shapes, rows in decoded:
+            for key, shape, values in rows:
+                yield key, dict(zip(shapes[shape], values))
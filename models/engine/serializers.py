@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+"""
+Contains the snapshot formats used by FileStorage
+
+Usage: python3 -m models.engine.serializers <source> <destination>
+converts a snapshot between formats, picked from the file extensions.
+"""
+
+import json
+import pickle
+import re
+import sys
+from datetime import datetime, timedelta
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_WHITESPACE = re.compile(r'\s*')
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _native(records):
+    """Turns the timestamp strings of JSON records back into datetimes"""
+    for key, record in records:
+        for attr in ('created_at', 'updated_at'):
+            if isinstance(record.get(attr), str):
+                record[attr] = datetime.fromisoformat(record[attr])
+        yield key, record
+
+
+def iter_json_object(f, size=1 << 16):
+    """Yields the (key, value) pairs of the JSON object in f one by one
+
+    Only one value is decoded at a time, so the whole document is never
+    held in memory as a single parsed dict.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = '', 0, False
+
+    def more():
+        """Reads the next chunk, dropping what was already consumed"""
+        nonlocal buf, pos, eof
+        data = f.read(size)
+        eof = not data
+        buf, pos = buf[pos:] + data, 0
+
+    def token():
+        """Returns the next non-blank character without consuming it"""
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            more()
+
+    def value():
+        """Decodes the next JSON value"""
+        nonlocal pos
+        while True:
+            try:
+                val, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    pos = end
+                    return val
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            more()
+
+    if token() != '{':
+        raise ValueError("Expecting '{' at the start of the file")
+    pos += 1
+    if token() == '}':
+        return
+    while True:
+        key = value()
+        if token() != ':':
+            raise ValueError("Expecting ':' after {!r}".format(key))
+        pos += 1
+        token()
+        yield key, value()
+        sep = token()
+        pos += 1
+        if sep == '}':
+            return
+        if sep != ',':
+            raise ValueError("Expecting ',' or '}' after {!r}".format(key))
+        token()
+
+
+class JSONSerializer:
+    """Snapshot stored as one JSON object of to_dict() records"""
+    name = 'json'
+    binary = False
+
+    def record(self, obj):
+        """Returns the record stored for obj"""
+        return obj.to_dict()
+
+    def dump(self, records, f):
+        """Writes the (key, record) pairs to f, one record at a time
+
+        Each record goes on its own line, so the file can be split on
+        line boundaries and decoded in parallel (see parallel.py).
+        """
+        encode = json.JSONEncoder(default=self.__default).encode
+        sep = '{'
+        for key, record in records:
+            f.write(sep + encode(key) + ': ' + encode(record))
+            sep = ',\n'
+        f.write('}' if sep == ',\n' else '{}')
+
+    def load(self, f):
+        """Yields the (key, record) pairs read from f"""
+        return iter_json_object(f)
+
+    @staticmethod
+    def __default(value):
+        """Formats the datetimes of records read from a binary snapshot"""
+        if isinstance(value, datetime):
+            return value.strftime(_TIME_FORMAT)
+        raise TypeError("{!r} is not JSON serializable".format(value))
+
+
+class PickleSerializer:
+    """Snapshot stored as a stream of pickle protocol 5 frames
+
+    Records keep their datetimes as datetime objects, so nothing is
+    reparsed on load. Only load snapshots written by this application:
+    unpickling runs arbitrary code from the file.
+    """
+    name = 'pickle'
+    binary = True
+    magic = b'HBNB-PICKLE-1\n'
+    frame = 1000
+
+    def record(self, obj):
+        """Returns the record stored for obj"""
+        record = obj.__dict__.copy()
+        record.pop('_sa_instance_state', None)
+        record['__class__'] = obj.__class__.__name__
+        return record
+
+    def dump(self, records, f):
+        """Writes the (key, record) pairs to f"""
+        f.write(self.magic)
+        chunk = []
+        for item in _native(records):
+            chunk.append(item)
+            if len(chunk) == self.frame:
+                pickle.dump(chunk, f, protocol=5)
+                chunk = []
+        if chunk:
+            pickle.dump(chunk, f, protocol=5)
+
+    def load(self, f):
+        """Yields the (key, record) pairs read from f"""
+        if f.read(len(self.magic)) != self.magic:
+            raise ValueError("Not a {} snapshot".format(self.name))
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+
+class MsgpackSerializer(PickleSerializer):
+    """Snapshot stored as a stream of msgpack (key, record) pairs
+
+    Datetimes are packed as microseconds since the epoch.
+    """
+    name = 'msgpack'
+    magic = b'HBNB-MSGPACK-1\n'
+
+    def dump(self, records, f):
+        """Writes the (key, record) pairs to f"""
+        f.write(self.magic)
+        packer = msgpack.Packer(default=self.__default)
+        for key, record in _native(records):
+            f.write(packer.pack((key, record)))
+
+    def load(self, f):
+        """Yields the (key, record) pairs read from f"""
+        if f.read(len(self.magic)) != self.magic:
+            raise ValueError("Not a {} snapshot".format(self.name))
+        unpacker = msgpack.Unpacker(f, ext_hook=self.__ext_hook,
+                                    use_list=True)
+        for key, record in unpacker:
+            yield key, record
+
+    @staticmethod
+    def __default(value):
+        """Packs a datetime as an extension type"""
+        if isinstance(value, datetime):
+            micros = (value - _EPOCH) // timedelta(microseconds=1)
+            return msgpack.ExtType(1, micros.to_bytes(8, 'little',
+                                                      signed=True))
+        raise TypeError("{!r} is not msgpack serializable".format(value))
+
+    @staticmethod
+    def __ext_hook(code, data):
+        """Unpacks the datetimes packed by __default"""
+        if code == 1:
+            micros = int.from_bytes(data, 'little', signed=True)
+            return _EPOCH + timedelta(microseconds=micros)
+        return msgpack.ExtType(code, data)
+
+
+serializers = {'json': JSONSerializer, 'pickle': PickleSerializer}
+if msgpack is not None:
+    serializers['msgpack'] = MsgpackSerializer
+
+
+def get_serializer(name):
+    """Returns the serializer registered under name"""
+    if name not in serializers:
+        raise ValueError("Unknown snapshot format: {}".format(name))
+    return serializers[name]()
+
+
+def convert(src, dst):
+    """Converts the snapshot src into dst, picking formats by extension"""
+    reader = get_serializer(src.rsplit('.', 1)[-1])
+    writer = get_serializer(dst.rsplit('.', 1)[-1])
+    with open(src, 'rb' if reader.binary else 'r') as fin, \
+            open(dst, 'wb' if writer.binary else 'w') as fout:
+        writer.dump(reader.load(fin), fout)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: {} <source> <destination>".format(sys.argv[0]))
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2])
@@ -34,23 +34,31 @@ class Place(BaseModel, Base):
         secondary=place_amenity,
         viewonly=False
     )
+    reviews = relationship(
+        "Review",
+        backref="place",
+        cascade="all, delete, delete-orphan"
+    )
     amenity_ids = []
 
     def __init__(self, *args, **kwargs):
         """Initializes Place"""
         super().__init__(*args, **kwargs)
 
-    if models.storage_t != "db":
+    if models.storage_t not in ("db", "async_db"):
+        @property
+        def reviews(self):
+            """FileStorage relationship between Place and Review"""
+            from models.review import Review
+            return models.storage.lookup(Review, 'place_id', self.id)
+
         @property
         def amenities(self):
             """FileStorage relationship between Place and Amenity"""
             from models.amenity import Amenity
-            amenity_list = []
-            all_amenities = models.storage.all(Amenity)
-            for amenity in all_amenities.values():
-                if amenity.id in self.amenity_ids:
-                    amenity_list.append(amenity)
-            return amenity_list
+            found = (models.storage.get(Amenity, amenity_id)
+                     for amenity_id in self.amenity_ids)
+            return [amenity for amenity in found if amenity is not None]
 
         @amenities.setter
         def amenities(self, obj):
@@ -58,4 +66,4 @@ class Place(BaseModel, Base):
             from models.amenity import Amenity
             if isinstance(obj, Amenity):
                 if obj.id not in self.amenity_ids:
-                    self.amenity_ids.append(obj.id)
+                    self.amenity_ids = self.amenity_ids + [obj.id]
@@ -16,13 +16,9 @@ class State(BaseModel, Base):
         cascade="all, delete, delete-orphan"
     )
 
-    @property
-    def cities(self):
-        """FileStorage relationship between State and City"""
-        from models.city import City
-        city_list = []
-        all_cities = models.storage.all(City)
-        for city in all_cities.values():
-            if city.state_id == self.id:
-                city_list.append(city)
-        return city_list
+    if models.storage_t not in ("db", "async_db"):
+        @property
+        def cities(self):
+            """FileStorage relationship between State and City"""
+            from models.city import City
+            return models.storage.lookup(City, 'state_id', self.id)
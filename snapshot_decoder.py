@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+"""
+Contains the function the worker processes of a parallel reload run
+(see models/engine/parallel.py)
+"""
+import json
+from datetime import datetime
+
+
+def decode(path, start, end, names):
+    """Decodes and checks the records between start and end in a worker
+
+    The snapshot holds one record per line (JSONSerializer.dump), so a
+    line is a '"key": {record}' member, with the object's braces on the
+    first and last lines. Timestamps are parsed here, and each record
+    is returned as its key, the index of its field names in a table
+    shared by the records of the same shape, and its values, which
+    pickle back to the parent much smaller than dicts.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if start == 0 and not data.lstrip().startswith(b'{'):
+        raise ValueError("Expecting '{' at the start of the file")
+    shapes = {}
+    rows = []
+    for line in data.split(b'\n'):
+        line = line.strip()
+        if line.startswith(b'{'):
+            line = line[1:]
+        line = line[:-1] if line.endswith(b',') else line[:-1].rstrip()
+        if not line:
+            continue
+        for key, record in json.loads(b'{' + line + b'}').items():
+            name = record.get('__class__') \
+                if isinstance(record, dict) else None
+            if name not in names or key.split('.', 1)[0] != name:
+                raise ValueError("Invalid record {!r}".format(key))
+            for attr in ('created_at', 'updated_at'):
+                if isinstance(record.get(attr), str):
+                    record[attr] = datetime.fromisoformat(record[attr])
+            shape = shapes.setdefault(tuple(record), len(shapes))
+            rows.append((key, shape, tuple(record.values())))
+    return list(shapes), rows
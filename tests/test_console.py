@@ -1,11 +1,14 @@
 #!/usr/bin/python3
 """Test Console"""
 import unittest
+import json
 import os
+import re
 import sys
 from io import StringIO
 from unittest.mock import patch
 from console import HBNBCommand
+from models.engine.file_storage import FileStorage
 from models import storage
 from models.state import State
 from models.city import City
@@ -56,6 +59,47 @@ class TestConsole(unittest.TestCase):
         self.assertIn(state_id, output)
         self.assertIn("State", output)
 
+    def test_count_destroy_update(self):
+        """Test count, destroy and update on stored objects"""
+        storage.all().clear()
+        state = State()
+        storage.new(state)
+        storage.new(State())
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd("count State")
+            self.console.onecmd("count City")
+            self.console.onecmd(f'update State {state.id} name "Ohio"')
+            self.console.onecmd(f"destroy State {state.id}")
+            self.console.onecmd(f"show State {state.id}")
+        self.assertEqual(f.getvalue().split('\n'),
+                         ['2', '0', '** no instance found **', ''])
+        self.assertEqual(state.name, "Ohio")
+        self.assertEqual(storage.count(State), 1)
+        state, = storage.all(State).values()
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd(f"update State {state.id} cities x")
+            self.console.onecmd(f"update State {state.id} __class__ x")
+            self.console.onecmd("create Place")
+        lines = f.getvalue().splitlines()
+        self.assertEqual(lines[:2], ["** can't update cities **",
+                                     "** can't update __class__ **"])
+        place_id = lines[2]
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd(f"update Place {place_id} max_guest many")
+        self.assertEqual(f.getvalue().split('\n'), [
+            '** invalid max_guest: many **', ''])
+
+    def test_update_commas(self):
+        """Test commas only separate the arguments of dot commands"""
+        storage.all().clear()
+        state = State()
+        storage.new(state)
+        self.console.onecmd(f"update State {state.id} name a,b")
+        self.assertEqual(state.name, "a,b")
+        line = self.console.precmd(f'State.update({state.id}, name, c)')
+        self.console.onecmd(line)
+        self.assertEqual(state.name, "c")
+
     def test_create_city_with_state_id(self):
         """Test create City with state_id parameter"""
         with patch('sys.stdout', new=StringIO()) as f:
@@ -120,6 +164,119 @@ class TestConsole(unittest.TestCase):
         self.assertEqual(place.latitude, -120.12)
         self.assertEqual(place.longitude, 0.41921928)
 
+    def test_bulk_import(self):
+        """Test bulk_import of a JSON-lines file"""
+        with open("states.jsonl", "w") as f:
+            f.write('{"name": "California", "id": "ca"}\n{}\n'
+                    '{"name": "Ohio", "created_at": 5}\n')
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd("bulk_import State states.jsonl")
+            output = f.getvalue()
+        os.remove("states.jsonl")
+        self.assertIn("1 imported, 2 rejected", output)
+        self.assertIn("** line 2: name is required **", output)
+        self.assertIn("** line 3: invalid created_at: 5 **", output)
+        self.assertEqual(storage.all()["State.ca"].name, "California")
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_bulk_import_errors(self):
+        """Test bulk_import argument errors"""
+        for cmd, message in (
+                ("bulk_import", "** class name missing **"),
+                ("bulk_import Foo x", "** class doesn't exist **"),
+                ("bulk_import State", "** file name missing **"),
+                ("bulk_import State nope.jsonl", "** file doesn't exist **")):
+            with patch('sys.stdout', new=StringIO()) as f:
+                self.console.onecmd(cmd)
+            self.assertEqual(f.getvalue().strip(), message)
+
+    def test_export(self):
+        """Test export streams JSON lines and CSV rows"""
+        state = State()
+        state.name = "Oregon"
+        storage.new(state)
+        cmd = "export State --where id={} --where 'name=Oregon'"
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd(cmd.format(state.id))
+            lines = f.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["name"], "Oregon")
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd(cmd.format(state.id) + " --format csv")
+            lines = f.getvalue().splitlines()
+        self.assertEqual(lines[0], "name,id,created_at,updated_at")
+        self.assertEqual(lines[1].split(",")[:2], ["Oregon", state.id])
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd("export State --where name=Nowhere")
+        self.assertEqual(f.getvalue(), "")
+
+    def test_export_errors(self):
+        """Test export argument errors"""
+        for cmd, message in (
+                ("export", "** class name missing **"),
+                ("export Foo", "** class doesn't exist **"),
+                ("export State --format xml",
+                 "** invalid option: --format **"),
+                ("export State --where name", "** invalid condition: name **"),
+                ("export State --where foo=1",
+                 "** unknown attribute: foo **")):
+            with patch('sys.stdout', new=StringIO()) as f:
+                self.console.onecmd(cmd)
+            self.assertEqual(f.getvalue().strip(), message)
+
+    def test_all_count_query(self):
+        """Test all and count with where, order by and limit"""
+        storage.all().clear()
+        for i in range(6):
+            place = Place()
+            place.city_id = "c{}".format(i % 2)
+            place.user_id = "u"
+            place.name = "P{}".format(i)
+            place.price_by_night = i * 10
+            storage.new(place)
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd("count Place where price_by_night<30")
+            self.console.onecmd("count Place where city_id=c1 and "
+                                "price_by_night>=30")
+            self.console.onecmd("count Place")
+            self.console.onecmd("count Place limit 4")
+        self.assertEqual(f.getvalue().split(), ['3', '2', '6', '4'])
+        with patch('sys.stdout', new=StringIO()) as f:
+            self.console.onecmd("all Place where city_id=c0 "
+                                "order by price_by_night desc limit 2")
+        self.assertEqual(re.findall(r"'name': '(P\d)'", f.getvalue()),
+                         ['P4', 'P2'])
+        for cmd, message in (
+                ("all Place where nope=1", "** unknown attribute: nope **"),
+                ("count Place order by nope",
+                 "** unknown attribute: nope **"),
+                ("all Place where name", "** invalid condition: name **"),
+                ("all Place limit x", "** invalid limit **")):
+            with patch('sys.stdout', new=StringIO()) as f:
+                self.console.onecmd(cmd)
+            self.assertEqual(f.getvalue().strip(), message)
+
+    def test_batch(self):
+        """Test batch runs a script with one save, reads in parallel"""
+        script = ['create State name="A"', 'State.count()', 'all City',
+                  'create City name="B"', 'count City', 'count State',
+                  'quit', 'create State']
+        outputs = []
+        for jobs in (1, 3):
+            storage.all().clear()
+            write = FileStorage._FileStorage__write
+            with patch.object(FileStorage, '_FileStorage__write',
+                              autospec=True, side_effect=write) as written, \
+                    patch('sys.stdout', new=StringIO()) as f:
+                times = self.console.batch(script, jobs)
+            self.assertEqual(written.call_count, 1)
+            self.assertEqual(times['commands'], 6)
+            self.assertEqual(times['reads'], 4)
+            lines = f.getvalue().splitlines()
+            outputs.append([lines[1:3], lines[4:]])
+        self.assertEqual(outputs, [[['1', '[]'], ['1', '1']]] * 2)
+        self.assertEqual(storage.count(State), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
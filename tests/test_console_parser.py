@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""Test the console parser"""
+import unittest
+import console_parser
+from console import HBNBCommand
+
+
+class TestConsoleParser(unittest.TestCase):
+    """Test the console parser"""
+
+    def test_parse_dot(self):
+        """Dot commands become plain command lines"""
+        commands = HBNBCommand.dot_cmds
+        self.assertEqual(console_parser.parse_dot('User.all()', commands),
+                         ('all User', ['User']))
+        self.assertEqual(
+            console_parser.parse_dot('User.update("1", "name", "A B")',
+                                     commands),
+            ('update User "1" "name" "A B"', ['User', '1', 'name', 'A B']))
+        self.assertEqual(
+            console_parser.parse_dot('User.update("1", {"age": 9})',
+                                     commands),
+            ('update User "1" {"age": 9}', ['User', '1', {'age': 9}]))
+        self.assertIsNone(console_parser.parse_dot('User.foo()', commands))
+        self.assertIsNone(console_parser.parse_dot('all User', commands))
+
+    def test_split(self):
+        """Arguments are split once, dicts parsed without eval"""
+        split = console_parser.split
+        self.assertEqual(split('User 1 name "John \\"J\\" Smith"'),
+                         ['User', '1', 'name', 'John "J" Smith'])
+        self.assertEqual(split("User 1 {'age': 9, \"x\": (1, 2)}"),
+                         ['User', '1', {'age': 9, 'x': (1, 2)}])
+        self.assertEqual(split('User 1 name a,b'),
+                         ['User', '1', 'name', 'a,b'])
+        self.assertEqual(split('User 1 {"a": __import__("os")}'),
+                         ['User', '1', '{"a": __import__("os")}'])
+        line, args = console_parser.parse_dot(
+            'User.update("1", "a", "b c")', HBNBCommand.dot_cmds)
+        self.assertEqual(split(line.partition(' ')[2]), args)
+
+    def test_dot_args(self):
+        """The console takes the arguments precmd split for its line"""
+        console = HBNBCommand()
+        line = console.precmd('User.show("1", {"a": "b c"})')
+        text = line.partition(' ')[2]
+        self.assertEqual(console.split(text), ['User', '1', {'a': 'b c'}])
+        self.assertEqual(console.split(text), ['User', '1', {'a': 'b c'}])
+        console.precmd('User.show("2")')
+        self.assertEqual(console.split('User 3'), ['User', '3'])
+
+    def test_parse_param(self):
+        """create parameters keep their documented conversions"""
+        parse = console_parser.parse_param
+        self.assertEqual(parse('name="My_little_\\"house\\""'),
+                         ('name', 'My little "house"'))
+        self.assertEqual(parse('latitude=37.77'), ('latitude', 37.77))
+        self.assertEqual(parse('max_guest=-3'), ('max_guest', -3))
+        self.assertIsNone(parse('max_guest=three'))
+        self.assertIsNone(parse('name'))
+
+    def test_parse_query(self):
+        """where/order by/limit clauses become engine arguments"""
+        parse = console_parser.parse_query
+        self.assertEqual(parse(''), ([], [], None))
+        self.assertEqual(
+            parse('where price_by_night<100 and name = "A B" '
+                  'order by price_by_night desc, name limit 20'),
+            ([('price_by_night', '<', '100'), ('name', '=', 'A B')],
+             ['-price_by_night', 'name'], 20))
+        self.assertEqual(parse('LIMIT 3'), ([], [], 3))
+        for text in ('where', 'where a<', 'where a<1 and', 'order by',
+                     'limit x', 'where a="b', 'name=1'):
+            with self.assertRaises(ValueError):
+                parse(text)
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+""" Module for testing the async storage engines"""
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+from models.engine.async_storage import AsyncDBStorage, AsyncFileStorage
+from models.state import State
+
+try:
+    import aiosqlite
+    import greenlet
+except ImportError:
+    aiosqlite = None
+
+
+class test_asyncFileStorage(unittest.IsolatedAsyncioTestCase):
+    """ Class to test the async file storage """
+
+    async def asyncSetUp(self):
+        """ Set up an async storage with an empty object dict """
+        self.storage = AsyncFileStorage()
+        (await self.storage.all()).clear()
+        await self.storage.save()
+
+    async def asyncTearDown(self):
+        """ Remove storage file at end of tests """
+        (await self.storage.all()).clear()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    async def test_save_reload(self):
+        """ save and reload run off the loop and keep the objects """
+        state = State()
+        state.name = 'Ohio'
+        self.storage.new(state)
+        self.assertEqual(await self.storage.save(), 1)
+        (await self.storage.all()).clear()
+        await self.storage.reload()
+        found = await self.storage.all(State)
+        self.assertEqual(found['State.' + state.id].name, 'Ohio')
+        self.assertEqual(self.storage.get(State, state.id).name, 'Ohio')
+
+    async def test_delete(self):
+        """ delete removes the object """
+        state = State()
+        self.storage.new(state)
+        await self.storage.delete(state)
+        self.assertEqual(len(await self.storage.all(State)), 0)
+
+    async def test_relationships(self):
+        """ State.cities and Place.amenities read the storage synchronously """
+        from models.amenity import Amenity
+        from models.city import City
+        from models.place import Place
+        state = State()
+        city = City()
+        city.state_id = state.id
+        amenity = Amenity()
+        place = Place()
+        place.amenities = amenity
+        for obj in (state, city, amenity, place):
+            self.storage.new(obj)
+        with patch('models.storage', self.storage):
+            self.assertEqual(state.cities, [city])
+            self.assertEqual(place.amenities, [amenity])
+
+
+@unittest.skipIf(aiosqlite is None, "aiosqlite and greenlet are required")
+class test_asyncDBStorage(unittest.IsolatedAsyncioTestCase):
+    """ Class to test the async db storage on a SQLite file """
+
+    async def asyncSetUp(self):
+        """ Create the tables of a fresh database """
+        self.directory = tempfile.TemporaryDirectory()
+        url = 'sqlite:///' + os.path.join(self.directory.name, 'hbnb.db')
+        with patch.dict(os.environ, {'HBNB_DB_URL': url}):
+            self.storage = AsyncDBStorage()
+        await self.storage.reload()
+
+    async def asyncTearDown(self):
+        """ Close the session and remove the database """
+        await self.storage.close()
+        await self.storage.dispose()
+        self.directory.cleanup()
+
+    async def test_new_save_all(self):
+        """ Objects saved by one session are read by the next """
+        state = State()
+        state.name = 'Ohio'
+        self.storage.new(state)
+        self.assertEqual(await self.storage.save(), 1)
+        await self.storage.close()
+        found = await self.storage.all('State')
+        self.assertEqual(found['State.' + state.id].name, 'Ohio')
+        self.assertEqual(await self.storage.count('State'), 1)
+        self.assertIs(await self.storage.get(State, state.id),
+                      found['State.' + state.id])
+        await self.storage.delete(found['State.' + state.id])
+        await self.storage.save()
+        self.assertEqual(await self.storage.all(State), {})
+        await self.storage.close()
+
+    async def test_query_generation(self):
+        """ query runs DBStorage.query, changes move the generation """
+        start = self.storage.generation()
+        for name in ('b', 'a', 'c'):
+            state = State()
+            state.name = name
+            self.storage.new(state)
+        await self.storage.save()
+        self.assertEqual(self.storage.generation(), start + 4)
+        await self.storage.close()
+        found = await self.storage.query(State, [('name', '!=', 'c')],
+                                         order_by='name')
+        self.assertEqual([s.name for s in found], ['a', 'b'])
+        rows = await self.storage.query(State, columns=('name',),
+                                        order_by='-name', limit=1)
+        self.assertEqual(rows, [('c',)])
+        await self.storage.close()
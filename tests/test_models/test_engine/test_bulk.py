@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+""" Module for testing the bulk import helpers"""
+import unittest
+import os
+from datetime import datetime
+from models.engine import bulk
+from models.place import Place
+from models.state import State
+
+
+class test_bulk(unittest.TestCase):
+    """ Class to test reading and validating bulk records """
+
+    def tearDown(self):
+        """ Remove the input files """
+        for path in ('bulk.jsonl', 'bulk.csv'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_read_jsonl(self):
+        """ JSON lines are read with their line numbers """
+        with open('bulk.jsonl', 'w') as f:
+            f.write('{"name": "a"}\n\nnot json\n')
+        self.assertEqual(list(bulk.read_records('bulk.jsonl')),
+                         [(1, {'name': 'a'}), (3, None)])
+
+    def test_read_csv(self):
+        """ CSV rows are read as dicts keyed by the header """
+        with open('bulk.csv', 'w') as f:
+            f.write('name,max_guest\nHome,4\n')
+        self.assertEqual(list(bulk.read_records('bulk.csv')),
+                         [(2, {'name': 'Home', 'max_guest': '4'})])
+
+    def test_validate_converts(self):
+        """ Values are converted to the column types """
+        row = bulk.validate(Place, {
+            'city_id': 'c', 'user_id': 'u', 'name': 'Home',
+            'max_guest': '4', 'latitude': '1.5', 'amenity_ids': ['a'],
+            'created_at': '2017-09-28T21:03:54.052298'})
+        self.assertEqual(row['max_guest'], 4)
+        self.assertEqual(row['latitude'], 1.5)
+        self.assertEqual(row['number_rooms'], 0)
+        self.assertEqual(row['amenity_ids'], ['a'])
+        self.assertEqual(row['created_at'],
+                         datetime(2017, 9, 28, 21, 3, 54, 52298))
+        self.assertIsInstance(row['id'], str)
+
+    def test_validate_rejects(self):
+        """ Unknown, invalid and missing values raise ValueError """
+        for record in ({'name': 'a', 'nom': 'b'}, {}, None,
+                       {'name': 'a', '__class__': 'City'}):
+            with self.assertRaises(ValueError):
+                bulk.validate(State, record)
+        with self.assertRaises(ValueError):
+            bulk.validate(Place, {'city_id': 'c', 'user_id': 'u',
+                                  'name': 'a', 'max_guest': 'many'})
+
+    def test_validated(self):
+        """ Invalid records are collected instead of raised """
+        errors = []
+        rows = list(bulk.validated(State, [(1, {'name': 'a'}), (2, {})],
+                                   errors))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(errors, [(2, 'name is required')])
+
+
+if __name__ == '__main__':
+    unittest.main()
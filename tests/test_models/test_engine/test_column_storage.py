@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+""" Module for testing the columnar storage"""
+import unittest
+import os
+import shutil
+from unittest.mock import patch
+from models.engine import column_storage
+from models.engine.column_storage import ColumnStorage
+from models.place import Place
+from models.state import State
+
+
+class test_columnStorage(unittest.TestCase):
+    """ Class to test filtering Places on mapped columns """
+
+    def setUp(self):
+        """ Save three places in an empty column storage """
+        self.storage = ColumnStorage()
+        self.storage.all().clear()
+        self.places = []
+        for price, guests, city in ((50, 2, 'a'), (150, 4, 'a'),
+                                    (80, 6, 'b')):
+            place = Place()
+            place.price_by_night = price
+            place.max_guest = guests
+            place.city_id = city
+            self.storage.new(place)
+            self.places.append(place)
+        self.storage.new(State())
+        self.storage.save()
+
+    def tearDown(self):
+        """ Remove storage and column files at end of tests """
+        self.storage.all().clear()
+        os.remove('file.json')
+        shutil.rmtree('file.columns')
+
+    def ids(self, conditions, cls=Place):
+        """ Returns the sorted ids matching conditions """
+        return sorted(p.id for p in self.storage.filter(cls, conditions))
+
+    def test_filter(self):
+        """ Numeric conditions are combined """
+        a, b, c = self.places
+        self.assertEqual(self.ids([('price_by_night', '<', 100)]),
+                         sorted([a.id, c.id]))
+        self.assertEqual(self.ids([('price_by_night', '<', 100),
+                                   ('max_guest', '>=', 4)]), [c.id])
+        self.assertEqual(self.ids([('price_by_night', '>', 1000)]), [])
+
+    def test_filter_coded(self):
+        """ city_id equality runs on its integer codes """
+        a, b, c = self.places
+        self.assertEqual(self.ids([('city_id', '=', 'a')]),
+                         sorted([a.id, b.id]))
+        self.assertEqual(self.ids([('city_id', '=', 'z')]), [])
+        self.assertEqual(self.ids([('city_id', '!=', 'a')]), [c.id])
+
+    def test_filter_without_numpy(self):
+        """ The pure Python scan gives the same rows """
+        a, b, c = self.places
+        with patch.object(column_storage, 'numpy', None):
+            self.assertEqual(self.ids([('price_by_night', '<', 100),
+                                       ('city_id', '=', 'a')]), [a.id])
+
+    def test_unsaved_changes(self):
+        """ Objects changed since the last save are checked directly """
+        a, b, c = self.places
+        a.price_by_night = 500
+        self.storage.new(a)
+        self.storage.delete(c)
+        self.assertEqual(self.ids([('price_by_night', '>', 100)]),
+                         sorted([a.id, b.id]))
+
+    def test_reload(self):
+        """ Columns are rebuilt from the snapshot on reload """
+        self.storage.all().clear()
+        self.storage.reload()
+        self.assertEqual(len(self.ids([('max_guest', '>', 0)])), 3)
+
+    def test_reload_keeps_places_raw(self):
+        """ reload builds no Place, filter only builds the matching ones """
+        a, b, c = self.places
+        self.storage.all().clear()
+        self.storage.reload()
+        built = self.storage._FileStorage__objects
+        self.assertFalse(any(key.startswith('Place.') for key in built))
+        self.assertEqual(self.storage.count(Place), 3)
+        self.assertEqual(self.ids([('price_by_night', '<', 60)]), [a.id])
+        self.assertEqual([key for key in built if key.startswith('Place.')],
+                         ['Place.' + a.id])
+
+    def test_query_uses_columns(self):
+        """ query, count and stream go through filter on mapped columns """
+        a, b, c = self.places
+        with patch.object(self.storage, 'filter',
+                          wraps=self.storage.filter) as scan:
+            found = self.storage.query(Place, [('price_by_night', '<', 100)],
+                                       order_by='price_by_night')
+            self.assertEqual([p.id for p in found], [a.id, c.id])
+            self.assertEqual(self.storage.count(
+                Place, [('city_id', '=', 'a'), ('max_guest', '>', 3)]), 1)
+            self.assertEqual(scan.call_count, 2)
+            self.assertEqual(self.storage.count(Place, [('name', '=', 'x')]),
+                             0)
+            self.assertEqual(scan.call_count, 2)
+
+    def test_other_class(self):
+        """ Classes without columns are filtered object by object """
+        self.assertEqual(len(self.ids([], State)), 1)
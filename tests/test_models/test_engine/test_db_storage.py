@@ -0,0 +1,335 @@
+#!/usr/bin/python3
+""" Module for testing db storage"""
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
+from models.base_model import Base
+from models.engine.db_storage import DBStorage
+from models.state import State
+
+now = datetime.utcnow()
+
+
+class test_DBStorageQuery(unittest.TestCase):
+    """ Class to test the query API of the db storage on SQLite """
+
+    def setUp(self):
+        """ Store five states in an in-memory database """
+        with patch.dict(os.environ, {'HBNB_DB_URL': 'sqlite://'}):
+            self.storage = DBStorage()
+        self.storage.reload()
+        self.states = []
+        for i, name in enumerate(['b', 'a', 'c', 'a', 'e']):
+            state = State()
+            state.id = str(i)
+            state.name = name
+            self.storage.new(state)
+            self.states.append(state)
+        self.storage.save()
+
+    def tearDown(self):
+        """ Close the session """
+        self.storage.close()
+
+    def test_all_wraps_query(self):
+        """ all(cls) is keyed like the file storage """
+        self.assertEqual(sorted(self.storage.all(State)),
+                         ['State.{}'.format(i) for i in range(5)])
+        self.assertEqual(len(self.storage.all('State')), 5)
+
+    def test_get_count(self):
+        """ get looks up a primary key and count runs COUNT(*) """
+        self.assertEqual(self.storage.get('State', '2').name, 'c')
+        self.assertIsNone(self.storage.get(State, 'x'))
+        self.assertIsNone(self.storage.get('Nope', '2'))
+        self.assertEqual(self.storage.count(State), 5)
+        self.assertEqual(self.storage.count('City'), 0)
+        self.assertEqual(self.storage.count(), 5)
+        self.assertEqual(self.storage.count(State, [('name', '=', 'a')]), 2)
+
+    def test_generation(self):
+        """ new, delete and committing saves move the generation """
+        start = self.storage.generation()
+        self.storage.delete(self.states[0])
+        self.assertEqual(self.storage.save(), 1)
+        self.assertEqual(self.storage.save(), 0)
+        self.assertEqual(self.storage.generation(), start + 2)
+
+    def test_filter_order(self):
+        """ Conditions and order_by run in SQL, id breaking ties """
+        found = self.storage.query(State, [('name', '<', 'c')],
+                                   order_by='name')
+        self.assertEqual([s.id for s in found], ['1', '3', '0'])
+        found = self.storage.query(State, order_by='-name', limit=2)
+        self.assertEqual([s.name for s in found], ['e', 'c'])
+
+    def test_keyset_pagination(self):
+        """ after resumes right behind the last row of a page """
+        pages = []
+        page = self.storage.query(State, order_by='name', limit=2)
+        while page:
+            pages.append([s.id for s in page])
+            page = self.storage.query(State, order_by='name', limit=2,
+                                      after=page[-1])
+        self.assertEqual(pages, [['1', '3'], ['0', '2'], ['4']])
+
+    def test_columns(self):
+        """ columns returns tuples of the selected attributes """
+        rows = self.storage.query(State, columns=('id', 'name'),
+                                  order_by='id', offset=3)
+        self.assertEqual(rows, [('3', 'a'), ('4', 'e')])
+
+
+class test_DBStoragePool(unittest.TestCase):
+    """ Class to test the connection pool on a SQLite file """
+
+    def setUp(self):
+        """ Set up a storage with a single connection and no overflow """
+        self.directory = tempfile.TemporaryDirectory()
+        env = {'HBNB_DB_URL': 'sqlite:///' + os.path.join(
+                   self.directory.name, 'hbnb.db'),
+               'HBNB_DB_POOL_SIZE': '1', 'HBNB_DB_MAX_OVERFLOW': '0',
+               'HBNB_DB_POOL_TIMEOUT': '0.2'}
+        with patch.dict(os.environ, env):
+            self.storage = DBStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close the session and remove the database """
+        self.storage.close()
+        self.directory.cleanup()
+
+    def test_checkout_pressure(self):
+        """ A checkout times out while another thread holds the pool """
+        holding = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            """ Keeps a session, and its connection, open """
+            self.storage.all(State)
+            holding.set()
+            release.wait()
+            self.storage.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        holding.wait()
+        stats = self.storage.pool_stats()
+        self.assertEqual((stats['size'], stats['checked_out']), (1, 1))
+        with self.assertRaises(TimeoutError):
+            self.storage.all(State)
+        release.set()
+        thread.join()
+        self.storage.close()
+        self.assertEqual(self.storage.all(State), {})
+        stats = self.storage.pool_stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertGreaterEqual(stats['max_wait'], 0.2)
+        self.assertGreaterEqual(stats['wait_time'], stats['max_wait'])
+        self.assertGreaterEqual(stats['checkouts'], 3)
+
+
+class test_DBStorageThreads(unittest.TestCase):
+    """ Class to test threads sharing the db storage on a SQLite file """
+
+    def setUp(self):
+        """ Set up a storage on an empty database file """
+        self.directory = tempfile.TemporaryDirectory()
+        url = 'sqlite:///' + os.path.join(self.directory.name, 'hbnb.db')
+        with patch.dict(os.environ, {'HBNB_DB_URL': url}):
+            self.storage = DBStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close the session and remove the database """
+        self.storage.close()
+        self.directory.cleanup()
+
+    def in_thread(self, work, during):
+        """ Runs work in a thread, during() being called once work waits
+        on its first argument, and returns what work returned """
+        ready, go, result = threading.Event(), threading.Event(), []
+
+        def run():
+            """ Runs work with an event pausing it """
+            result.append(work(lambda: (ready.set(), go.wait())))
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        ready.wait()
+        during()
+        go.set()
+        thread.join()
+        return result[0]
+
+    def test_close_keeps_other_flushes(self):
+        """ A close in one thread does not drop another thread's flush """
+        def work(pause):
+            """ Flushes a new state, then saves it """
+            state = State()
+            state.name = 'Ohio'
+            self.storage.new(state)
+            self.storage._DBStorage__session.flush()
+            pause()
+            count = self.storage.save()
+            self.storage.close()
+            return count
+
+        self.assertEqual(self.in_thread(work, self.storage.close), 1)
+        self.assertEqual(self.storage.count(State), 1)
+
+    def test_batch_is_per_thread(self):
+        """ A batch in one thread does not defer another thread's save """
+        def work(pause):
+            """ Saves a state while the main thread is in a batch """
+            pause()
+            state = State()
+            state.name = 'Utah'
+            self.storage.new(state)
+            count = self.storage.save()
+            self.storage.close()
+            return count
+
+        with self.storage.batch():
+            state = State()
+            state.name = 'Ohio'
+            self.storage.new(state)
+            self.storage.save()
+            self.assertEqual(self.in_thread(work, lambda: None), 1)
+        self.storage.close()
+        self.assertEqual(sorted(s.name for s in self.storage.query(State)),
+                         ['Ohio', 'Utah'])
+
+
+class test_DBStorageReplicas(unittest.TestCase):
+    """ Class to test read-replica routing with SQLite files """
+
+    def setUp(self):
+        """ Create a primary and two replicas, each with its own state """
+        self.directory = tempfile.TemporaryDirectory()
+        urls = ['sqlite:///' + os.path.join(self.directory.name, name)
+                for name in ('primary.db', 'replica1.db', 'replica2.db')]
+        self.engines = []
+        for i, url in enumerate(urls):
+            engine = create_engine(url)
+            Base.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(State.__table__.insert(), [
+                    {'id': 'shared', 'name': 'Shared', 'created_at': now,
+                     'updated_at': now},
+                    {'id': str(i), 'name': 'Only', 'created_at': now,
+                     'updated_at': now}])
+            self.engines.append(engine)
+        env = {'HBNB_DB_URL': urls[0], 'HBNB_DB_REPLICAS': ','.join(urls[1:])}
+        with patch.dict(os.environ, env):
+            self.storage = DBStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close the sessions and remove the databases """
+        self.storage.close()
+        for engine in self.engines:
+            engine.dispose()
+        self.directory.cleanup()
+
+    def test_round_robin(self):
+        """ Reads alternate between the replicas """
+        found = [sorted(self.storage.all(State)) for i in range(3)]
+        self.assertEqual(found, [['State.1', 'State.shared'],
+                                 ['State.2', 'State.shared'],
+                                 ['State.1', 'State.shared']])
+
+    def test_read_your_writes(self):
+        """ Once the session writes, reads stay on the primary """
+        state = State()
+        state.name = 'New'
+        self.storage.new(state)
+        self.storage.save()
+        self.assertIn('State.' + state.id, self.storage.all(State))
+        self.assertIn('State.0', self.storage.all(State))
+        self.storage.close()
+        self.assertNotIn('State.' + state.id, self.storage.all(State))
+
+    def test_update_replica_object(self):
+        """ An object read from a replica is written to the primary """
+        state = self.storage.all(State)['State.shared']
+        state.name = 'Renamed'
+        self.storage.new(state)
+        self.storage.save()
+        names = []
+        for engine in self.engines[:2]:
+            with engine.connect() as connection:
+                names.append([row.name for row in connection.execute(
+                    State.__table__.select())])
+        self.assertIn('Renamed', names[0])
+        self.assertNotIn('Renamed', names[1])
+
+
+# fills a SQLite database in DB mode, then prints how many statements a
+# request to a route of a web_flask module runs
+COUNT_QUERIES = """
+import importlib, sys
+from sqlalchemy import event
+from models import storage
+from models.state import State
+from models.city import City
+from models.amenity import Amenity
+for i in range(int(sys.argv[3])):
+    state = State()
+    state.id, state.name = 's{}'.format(i), 'State {}'.format(i)
+    storage.new(state)
+    for j in range(3):
+        city = City()
+        city.id, city.name = 'c{}-{}'.format(i, j), 'City {}'.format(j)
+        city.state_id = state.id
+        storage.new(city)
+amenity = Amenity()
+amenity.id, amenity.name = 'a', 'Wifi'
+storage.new(amenity)
+storage.save()
+storage.close()
+app = importlib.import_module('web_flask.' + sys.argv[1]).app
+statements = []
+event.listen(storage._DBStorage__engine, 'before_cursor_execute',
+             lambda *args: statements.append(args[2]))
+response = app.test_client().get(sys.argv[2])
+assert response.status_code == 200
+print(len(statements))
+"""
+
+
+class test_DBStorageEager(unittest.TestCase):
+    """ Class to test that routes load relationships eagerly in DB mode """
+
+    def count(self, module, route, states):
+        """ Returns the statements run by route with that many states """
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ, HBNB_TYPE_STORAGE='db',
+                       HBNB_DB_URL='sqlite:///' +
+                       os.path.join(directory, 'hbnb.db'))
+            out = subprocess.run(
+                [sys.executable, '-c', COUNT_QUERIES, module, route,
+                 str(states)], cwd=root, env=env, capture_output=True,
+                text=True, check=True).stdout
+        return int(out)
+
+    def test_cities_by_states(self):
+        """ /cities_by_states runs one query however many states """
+        self.assertEqual(self.count('8-cities_by_states',
+                                    '/cities_by_states', 2), 1)
+        self.assertEqual(self.count('8-cities_by_states',
+                                    '/cities_by_states', 20), 1)
+
+    def test_hbnb_filters(self):
+        """ /hbnb_filters runs a constant number of queries """
+        self.assertEqual(self.count('10-hbnb_filters', '/hbnb_filters', 2),
+                         self.count('10-hbnb_filters', '/hbnb_filters', 20))
@@ -4,6 +4,9 @@ import unittest
 from models.base_model import BaseModel
 from models import storage
 import os
+import glob
+import json
+from unittest.mock import patch
 
 
 class test_fileStorage(unittest.TestCase):
@@ -107,3 +110,749 @@ class test_fileStorage(unittest.TestCase):
         from models.engine.file_storage import FileStorage
         print(type(storage))
         self.assertEqual(type(storage), FileStorage)
+
+
+class test_fileStorageJournal(unittest.TestCase):
+    """ Class to test the append-only journal of the file storage """
+
+    def setUp(self):
+        """ Set up a journaling storage with an empty object dict """
+        from models.engine.file_storage import FileStorage
+        with patch.dict(os.environ, {'HBNB_FILE_JOURNAL': '1'}):
+            self.storage = FileStorage()
+        self.storage.all().clear()
+
+    def tearDown(self):
+        """ Remove storage and journal files at end of tests """
+        self.storage._FileStorage__wait()
+        self.storage.all().clear()
+        for path in ('file.json', 'file.json.journal',
+                     'file.json.journal.old'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_save_appends(self):
+        """ save only appends the new objects to the journal """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.assertFalse(os.path.exists('file.json'))
+        with open('file.json.journal') as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 1)
+        self.storage.new(BaseModel())
+        self.storage.save()
+        with open('file.json.journal') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_reload_replays(self):
+        """ reload rebuilds objects and deletions from the journal """
+        kept = BaseModel()
+        gone = BaseModel()
+        self.storage.new(kept)
+        self.storage.new(gone)
+        self.storage.save()
+        self.storage.delete(gone)
+        self.storage.save()
+        self.storage.all().clear()
+        self.storage.reload()
+        self.assertIn('BaseModel.' + kept.id, self.storage.all())
+        self.assertNotIn('BaseModel.' + gone.id, self.storage.all())
+
+    def test_compaction(self):
+        """ A journal past the limit is folded into the snapshot """
+        self.storage._FileStorage__limit = 1
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.storage._FileStorage__wait()
+        self.assertFalse(os.path.exists('file.json.journal'))
+        self.assertFalse(os.path.exists('file.json.journal.old'))
+        with open('file.json') as f:
+            self.assertIn('BaseModel.' + new.id, json.load(f))
+
+
+class test_fileStorageIndex(unittest.TestCase):
+    """ Class to test the per-class index of the file storage """
+
+    def setUp(self):
+        """ Empty the storage through its own API """
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+
+    def tearDown(self):
+        """ Remove storage file at end of tests """
+        self.setUp()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_all_cls(self):
+        """ all(cls) only returns objects of that class """
+        from models.state import State
+        from models.city import City
+        state = State()
+        storage.new(state)
+        storage.new(City())
+        self.assertEqual(list(storage.all(State)), ['State.' + state.id])
+        self.assertEqual(list(storage.all('State')), ['State.' + state.id])
+        self.assertEqual(len(storage.all(BaseModel)), 2)
+
+    def test_all_cls_copy(self):
+        """ all(cls) is a copy, safe to iterate while deleting """
+        from models.state import State
+        state = State()
+        storage.new(state)
+        states = storage.all(State)
+        states['State.x'] = state
+        self.assertNotIn('State.x', storage.all(State))
+        for obj in storage.all(State).values():
+            storage.delete(obj)
+        self.assertIn('State.' + state.id, states)
+        self.assertEqual(storage.all(State), {})
+
+    def test_get_count(self):
+        """ get and count read the class index """
+        from models.state import State
+        from models.city import City
+        state = State()
+        storage.new(state)
+        storage.new(City())
+        storage.new(City())
+        self.assertIs(storage.get('State', state.id), state)
+        self.assertIs(storage.get(State, state.id), state)
+        self.assertIsNone(storage.get(City, state.id))
+        self.assertEqual(storage.count(City), 2)
+        self.assertEqual(storage.count('State'), 1)
+        self.assertEqual(storage.count(BaseModel), 3)
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count('Nope'), 0)
+
+    def test_stream_uses_index(self):
+        """ an equality on a foreign key only visits its index bucket """
+        from models.engine.file_storage import predicate
+        from models.city import City
+        cities = []
+        for state_id in ('1', '1', '2'):
+            city = City()
+            city.state_id = state_id
+            city.name = 'City ' + city.id
+            storage.new(city)
+            cities.append(city)
+        check = predicate([('state_id', '=', '1'), ('name', '!=', 'x')])
+        self.assertTrue(check(cities[0]))
+        self.assertFalse(check(cities[2]))
+        seen = []
+        with patch('models.engine.file_storage.predicate',
+                   return_value=lambda obj: seen.append(obj) or True):
+            list(storage.stream('City', [('state_id', '=', '1')]))
+        self.assertEqual(sorted(c.id for c in seen),
+                         sorted(c.id for c in cities[:2]))
+        self.assertEqual(storage.count(City, [('state_id', '=', '2')]), 1)
+
+    def test_generation(self):
+        """ new, delete, save and reloads of a changed file move it """
+        from models.state import State
+        state = State()
+        start = storage.generation()
+        storage.new(state)
+        storage.save()
+        self.assertEqual(storage.generation(), start + 2)
+        storage.reload()
+        self.assertEqual(storage.generation(), start + 2)
+        storage.delete(state)
+        self.assertEqual(storage.generation(), start + 3)
+        with open('file.json', 'w') as f:
+            f.write('{}')
+        storage.reload()
+        self.assertEqual(storage.generation(), start + 4)
+
+    def test_reload_indexes(self):
+        """ reload fills the class index """
+        from models.amenity import Amenity
+        amenity = Amenity()
+        storage.new(amenity)
+        storage.save()
+        self.setUp()
+        storage.reload()
+        self.assertIn('Amenity.' + amenity.id, storage.all(Amenity))
+
+    def test_lookup(self):
+        """ lookup follows foreign keys through new and delete """
+        from models.city import City
+        city = City()
+        city.state_id = '1'
+        storage.new(city)
+        self.assertEqual(storage.lookup(City, 'state_id', '1'), [city])
+        city.state_id = '2'
+        storage.new(city)
+        self.assertEqual(storage.lookup(City, 'state_id', '1'), [])
+        self.assertEqual(storage.lookup('City', 'state_id', '2'), [city])
+        storage.delete(city)
+        self.assertEqual(storage.lookup(City, 'state_id', '2'), [])
+
+    def test_reload_stats(self):
+        """ reload reports how many records it loaded """
+        new = BaseModel()
+        storage.new(new)
+        storage.save()
+        storage.reload()
+        stats = storage.reload_stats()
+        self.assertGreaterEqual(stats['records'], 1)
+        self.assertGreaterEqual(stats['seconds'], 0)
+
+    def test_stream(self):
+        """ stream yields the objects of a class passing the conditions """
+        from models.place import Place
+        cheap = Place()
+        cheap.price_by_night = 50
+        storage.new(cheap)
+        dear = Place()
+        dear.price_by_night = 500
+        storage.new(dear)
+        storage.new(BaseModel())
+        self.assertEqual(len(list(storage.stream(Place))), 2)
+        self.assertEqual(len(list(storage.stream('BaseModel'))), 1)
+        self.assertEqual(list(storage.stream(
+            Place, [('price_by_night', '<', 100)])), [cheap])
+
+    def test_query(self):
+        """ query sorts, pages and projects like DBStorage.query """
+        from models.state import State
+        for i, name in enumerate(['b', 'a', 'c', 'a']):
+            state = State()
+            state.id = str(i)
+            state.name = name
+            storage.new(state)
+        page = storage.query(State, order_by='name', limit=2)
+        self.assertEqual([s.id for s in page], ['1', '3'])
+        page = storage.query(State, order_by='name', after=page[-1])
+        self.assertEqual([s.id for s in page], ['0', '2'])
+        self.assertEqual(storage.query(State, [('name', '=', 'a')],
+                                       order_by='-id', columns=('id',)),
+                         [('3',), ('1',)])
+
+    def test_query_none(self):
+        """ query sorts missing values first, like SQL NULLs """
+        from models.place import Place
+        for i, price in enumerate([300, None, 100, None]):
+            place = Place()
+            place.id = str(i)
+            place.price_by_night = price
+            storage.new(place)
+        page = storage.query(Place, order_by='price_by_night', limit=3)
+        self.assertEqual([p.id for p in page], ['1', '3', '2'])
+        page = storage.query(Place, order_by='price_by_night', after=page[1])
+        self.assertEqual([p.id for p in page], ['2', '0'])
+        page = storage.query(Place, order_by='-price_by_night',
+                             after=page[-1])
+        self.assertEqual([p.id for p in page], ['2', '1', '3'])
+
+
+class test_fileStorageLazy(unittest.TestCase):
+    """ Class to test lazy hydration of the file storage """
+
+    def setUp(self):
+        """ Save a State and a City, then empty the storage """
+        from models.engine.file_storage import FileStorage
+        from models.state import State
+        from models.city import City
+        with patch.dict(os.environ, {'HBNB_LAZY_LOAD': '1'}):
+            self.storage = FileStorage()
+        self.storage.all().clear()
+        self.state = State()
+        self.city = City()
+        self.city.state_id = self.state.id
+        self.storage.new(self.state)
+        self.storage.new(self.city)
+        self.storage.save()
+        self.storage.all().clear()
+        self.objects = self.storage._FileStorage__objects
+
+    def tearDown(self):
+        """ Remove storage file at end of tests """
+        self.storage.all().clear()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_reload_builds_nothing(self):
+        """ reload keeps the records serialized """
+        self.storage.reload()
+        self.assertEqual(len(self.objects), 0)
+
+    def test_all_cls_builds_one_class(self):
+        """ all(cls) only builds the instances of cls """
+        from models.state import State
+        self.storage.reload()
+        self.assertIn('State.' + self.state.id, self.storage.all(State))
+        self.assertEqual(list(self.objects), ['State.' + self.state.id])
+        self.assertEqual(len(self.storage.all()), 2)
+
+    def test_relationship(self):
+        """ A relationship property builds the related class """
+        from models.state import State
+        self.storage.reload()
+        state = self.storage.all(State)['State.' + self.state.id]
+        self.assertEqual([c.id for c in state.cities], [self.city.id])
+
+    def test_save_keeps_raw_records(self):
+        """ save writes records that were never built """
+        from models.state import State
+        self.storage.reload()
+        self.storage.all(State)
+        self.storage.save()
+        with open('file.json') as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    def test_stream_builds_nothing(self):
+        """ stream does not keep the instances it builds """
+        from models.city import City
+        self.storage.reload()
+        cities = list(self.storage.stream(City, [('state_id', '=',
+                                                  self.state.id)]))
+        self.assertEqual([c.id for c in cities], [self.city.id])
+        self.assertEqual(len(self.objects), 0)
+
+    def test_delete_raw(self):
+        """ delete drops a record that was never built """
+        from models.city import City
+        self.storage.reload()
+        self.storage.delete(self.city)
+        self.assertEqual(len(self.storage.all(City)), 0)
+
+
+class test_fileStorageDirty(unittest.TestCase):
+    """ Class to test dirty tracking between saves """
+
+    def setUp(self):
+        """ Set up a journaling storage holding one saved State """
+        from models.engine.file_storage import FileStorage
+        from models.state import State
+        with patch.dict(os.environ, {'HBNB_FILE_JOURNAL': '1'}):
+            self.storage = FileStorage()
+        self.storage.all().clear()
+        self.state = State()
+        self.storage.new(self.state)
+        self.storage.save()
+
+    def tearDown(self):
+        """ Remove storage and journal files at end of tests """
+        self.storage.all().clear()
+        for path in ('file.json', 'file.json.journal'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_save_count(self):
+        """ save returns how many objects it persisted """
+        self.assertEqual(self.storage.save(), 0)
+        self.state.name = 'Texas'
+        self.assertEqual(self.storage.save(), 1)
+        self.storage.delete(self.state)
+        self.assertEqual(self.storage.save(), 1)
+
+    def test_setattr_persisted(self):
+        """ A changed attribute reaches the journal without new() """
+        self.state.name = 'Texas'
+        self.storage.save()
+        self.storage.all().clear()
+        self.storage.reload()
+        key = 'State.' + self.state.id
+        self.assertEqual(self.storage.all()[key].name, 'Texas')
+
+    def test_unstored_not_dirty(self):
+        """ Objects that were never stored are not tracked """
+        from models.state import State
+        State().name = 'Nevada'
+        self.assertEqual(self.storage.save(), 0)
+
+    def test_foreign_key_change(self):
+        """ Setting a foreign key moves the object in lookup """
+        from models.city import City
+        city = City()
+        city.state_id = '1'
+        self.storage.new(city)
+        city.state_id = '2'
+        self.assertEqual(self.storage.lookup(City, 'state_id', '1'), [])
+        self.assertEqual(self.storage.lookup(City, 'state_id', '2'), [city])
+
+
+class test_fileStorageBatch(unittest.TestCase):
+    """ Class to test group commits of the file storage """
+
+    def setUp(self):
+        """ Empty the storage """
+        storage.all().clear()
+
+    def tearDown(self):
+        """ Remove storage file at end of tests """
+        storage.all().clear()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_batch_defers_saves(self):
+        """ Saves inside a batch are written once at the end """
+        with storage.batch():
+            for i in range(3):
+                new = BaseModel()
+                new.save()
+                self.assertFalse(os.path.exists('file.json'))
+        with open('file.json') as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_nested_batch(self):
+        """ Only the outermost batch writes """
+        with storage.batch():
+            with storage.batch():
+                BaseModel().save()
+            self.assertFalse(os.path.exists('file.json'))
+        self.assertTrue(os.path.exists('file.json'))
+
+    def test_batch_without_save(self):
+        """ A batch with no save writes nothing """
+        with storage.batch():
+            storage.new(BaseModel())
+        self.assertFalse(os.path.exists('file.json'))
+
+
+class test_fileStorageThreads(unittest.TestCase):
+    """ Class to test the file storage under concurrent threads """
+
+    def setUp(self):
+        """ Empty the storage """
+        storage.all().clear()
+        storage.save()
+
+    def tearDown(self):
+        """ Remove storage file at end of tests """
+        storage.all().clear()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_stress(self):
+        """ Writers, savers and readers run together without errors """
+        import threading
+        from models.state import State
+        errors = []
+        created = []
+
+        def run(job):
+            """ Runs job 200 times, keeping any exception """
+            try:
+                for i in range(200):
+                    job(i)
+            except Exception as e:
+                errors.append(e)
+
+        def write(i):
+            """ Stores a new state then renames it """
+            state = State()
+            storage.new(state)
+            state.name = 'State {}'.format(i)
+            created.append(state.id)
+            if i % 20 == 0:
+                storage.save()
+
+        def read(i):
+            """ Reads through every read API """
+            list(storage.stream(State))
+            storage.query(State, order_by='id', limit=5)
+            dict(storage.all(State))
+            try:
+                with open('file.json') as f:
+                    json.load(f)
+            except FileNotFoundError:
+                pass
+
+        def save(i):
+            """ Saves whatever is stored """
+            storage.save()
+
+        threads = [threading.Thread(target=run, args=(job,))
+                   for job in (write, write, write, save, read, read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        storage.save()
+        with open('file.json') as f:
+            saved = json.load(f)
+        self.assertEqual(len(created), 600)
+        self.assertEqual(sorted(saved), sorted('State.' + _id
+                                               for _id in created))
+        self.assertTrue(all(record['name'].startswith('State ')
+                            for record in saved.values()))
+        self.assertEqual(glob.glob('file.json*.tmp'), [])
+
+
+# run by the child processes of test_fileStorageShared: creates a state
+# named argv[1] for each name and deletes the states of the argv[2] ids
+CHILD = """
+import sys
+from models import storage
+from models.state import State
+for name in sys.argv[1].split(','):
+    state = State()
+    state.name = name
+    storage.new(state)
+    storage.save()
+for _id in filter(None, sys.argv[2:]):
+    storage.delete(storage.get(State, _id))
+    storage.save()
+"""
+
+
+class test_fileStorageShared(unittest.TestCase):
+    """ Class to test a file storage shared by several processes """
+
+    def setUp(self):
+        """ Set up a shared storage with an empty object dict """
+        from models.engine.file_storage import FileStorage
+        with patch.dict(os.environ, {'HBNB_FILE_SHARED': '1'}):
+            self.storage = FileStorage()
+        self.storage.all().clear()
+        self.storage.save()
+
+    def tearDown(self):
+        """ Remove storage and lock files at end of tests """
+        storage.all().clear()
+        for path in ('file.json', 'file.json.lock'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def run_children(self, *argvs):
+        """ Runs one child process per argv at the same time """
+        import subprocess
+        import sys
+        env = dict(os.environ, HBNB_FILE_SHARED='1')
+        children = [subprocess.Popen([sys.executable, '-c', CHILD] +
+                                     list(argv), env=env)
+                    for argv in argvs]
+        for child in children:
+            self.assertEqual(child.wait(), 0)
+
+    def names(self):
+        """ Returns the sorted names of the stored states """
+        from models.state import State
+        return sorted(s.name for s in self.storage.all(State).values())
+
+    def test_reads_see_other_processes(self):
+        """ A read reloads the file another process replaced """
+        from models.state import State
+        kept = State()
+        kept.name = 'kept'
+        gone = State()
+        gone.name = 'gone'
+        self.storage.new(kept)
+        self.storage.new(gone)
+        self.storage.save()
+        self.assertFalse(self.storage.refresh())
+        self.run_children(('child', gone.id))
+        self.assertEqual(self.names(), ['child', 'kept'])
+        self.assertFalse(self.storage.refresh())
+
+    def test_save_merges(self):
+        """ A stale writer keeps the records other processes wrote """
+        from models.state import State
+        mine = State()
+        mine.name = 'mine'
+        self.storage.new(mine)
+        self.run_children(('a1,a2,a3',), ('b1,b2,b3',), ('c1,c2,c3',))
+        self.storage.save()
+        with open('file.json') as f:
+            saved = sorted(r['name'] for r in json.load(f).values())
+        self.assertEqual(saved, ['a1', 'a2', 'a3', 'b1', 'b2', 'b3',
+                                 'c1', 'c2', 'c3', 'mine'])
+        self.assertEqual(self.names(), saved)
+
+
+class test_fileStorageShards(unittest.TestCase):
+    """ Class to test the sharded layout of the file storage """
+
+    def sharded(self, **env):
+        """ Returns an empty storage built with the given variables """
+        from models.engine.file_storage import FileStorage
+        with patch.dict(os.environ, env):
+            sharded = FileStorage()
+        sharded.all().clear()
+        return sharded
+
+    def fill(self, sharded, cls, count):
+        """ Stores and returns count new objects of cls """
+        objs = []
+        for i in range(count):
+            obj = cls()
+            obj.name = '{} {}'.format(cls.__name__, i)
+            sharded.new(obj)
+            objs.append(obj)
+        return objs
+
+    def tearDown(self):
+        """ Remove the storage files at end of tests """
+        import shutil
+        storage.all().clear()
+        shutil.rmtree('file.json.d', ignore_errors=True)
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_one_file_per_class(self):
+        """ save only rewrites the shards of changed objects """
+        from models.engine.file_storage import FileStorage
+        from models.state import State
+        from models.city import City
+        sharded = self.sharded(HBNB_FILE_SHARDS='1')
+        state, = self.fill(sharded, State, 1)
+        self.fill(sharded, City, 2)
+        sharded.save()
+        self.assertEqual(sorted(os.listdir('file.json.d')),
+                         ['City.json', 'State.json'])
+        write = FileStorage._FileStorage__write
+        with patch.object(FileStorage, '_FileStorage__write',
+                          autospec=True, side_effect=write) as written:
+            state.name = 'Renamed'
+            self.assertEqual(sharded.save(), 1)
+        self.assertEqual([call.args[1] for call in written.call_args_list],
+                         [os.path.join('file.json.d', 'State.json')])
+        sharded.all().clear()
+        sharded.reload()
+        self.assertEqual(len(sharded.all()), 3)
+        self.assertEqual(sharded.get(State, state.id).name, 'Renamed')
+
+    def test_hash_buckets(self):
+        """ Objects are split over the buckets and read back """
+        from models.state import State
+        sharded = self.sharded(HBNB_FILE_SHARDS='4',
+                               HBNB_RELOAD_WORKERS='3')
+        states = self.fill(sharded, State, 40)
+        sharded.save()
+        self.assertEqual(sorted(os.listdir('file.json.d')),
+                         ['State.{}.json'.format(i) for i in range(4)])
+        sharded.all().clear()
+        sharded.reload()
+        self.assertEqual(sorted(sharded.all(State)),
+                         sorted('State.' + s.id for s in states))
+        self.assertEqual(sharded.reload_stats()['records'], 40)
+
+    def test_class_restricted(self):
+        """ A process restricted to some classes keeps the others """
+        from models.state import State
+        from models.city import City
+        sharded = self.sharded(HBNB_FILE_SHARDS='1')
+        self.fill(sharded, State, 1)
+        cities = self.fill(sharded, City, 2)
+        sharded.save()
+        sharded = self.sharded(HBNB_FILE_SHARDS='1',
+                               HBNB_FILE_CLASSES='State')
+        sharded.reload()
+        self.assertEqual(len(sharded.all()), 1)
+        cities += self.fill(sharded, City, 1)
+        sharded.save()
+        with open(os.path.join('file.json.d', 'City.json')) as f:
+            self.assertEqual(sorted(json.load(f)),
+                             sorted('City.' + c.id for c in cities))
+
+    def test_migrates_snapshot(self):
+        """ An existing file.json is moved into the shards """
+        from models.state import State
+        states = self.fill(storage, State, 2)
+        storage.save()
+        sharded = self.sharded(HBNB_FILE_SHARDS='2')
+        sharded.reload()
+        sharded.save()
+        self.assertFalse(os.path.exists('file.json'))
+        sharded.all().clear()
+        sharded.reload()
+        self.assertEqual(sorted(sharded.all(State)),
+                         sorted('State.' + s.id for s in states))
+
+
+class test_fileStorageParallel(unittest.TestCase):
+    """ Class to test the reload of the file storage by worker processes """
+
+    def tearDown(self):
+        """ Remove storage file at end of tests """
+        storage.all().clear()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_same_objects(self):
+        """ a parallel reload builds the objects of a sequential one """
+        from models.engine.file_storage import FileStorage
+        from models.state import State
+        from models.city import City
+        storage.all().clear()
+        for i in range(50):
+            state = State()
+            state.name = 'State {}'.format(i)
+            storage.new(state)
+            city = City()
+            city.state_id = state.id
+            storage.new(city)
+        storage.save()
+        expected = {key: obj.to_dict() for key, obj in storage.all().items()}
+        with patch.dict(os.environ, {'HBNB_RELOAD_PROCESSES': '2'}):
+            parallel = FileStorage()
+        parallel.all().clear()
+        parallel.reload()
+        self.assertEqual(list(parallel.all()), list(expected))
+        for key, obj in parallel.all().items():
+            self.assertEqual(obj.to_dict(), expected[key])
+        self.assertEqual(parallel.reload_stats()['records'], 100)
+
+    def test_import(self):
+        """ the reload run by importing models uses the workers """
+        import subprocess
+        import sys
+        from models.state import State
+        storage.all().clear()
+        for i in range(20):
+            storage.new(State())
+        storage.save()
+        env = dict(os.environ, HBNB_RELOAD_PROCESSES='2')
+        out = subprocess.run(
+            [sys.executable, '-c', 'from models import storage; '
+             'print(storage.count("State"))'],
+            env=env, capture_output=True, text=True, timeout=60)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertEqual(out.stdout.strip(), '20')
+
+    def test_invalid_record(self):
+        """ a record of an unknown class stops the reload """
+        from models.engine import parallel
+        with open('file.json', 'w') as f:
+            f.write('{"State.1": {"id": "1", "__class__": "State"},\n'
+                    '"Nope.2": {"id": "2", "__class__": "Nope"}}')
+        with self.assertRaises(ValueError):
+            list(parallel.load('file.json', 2, {'State'}))
+
+    def test_chunks(self):
+        """ chunks end on line boundaries and cover the file """
+        from models.engine import parallel
+        with open('file.json', 'w') as f:
+            f.write('{' + ',\n'.join('"k{}": {{}}'.format(i)
+                                     for i in range(100)) + '}')
+        ranges = parallel.chunks('file.json', 7)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], os.path.getsize('file.json'))
+        with open('file.json', 'rb') as f:
+            data = f.read()
+        for (start, end), (following, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, following)
+            self.assertEqual(data[end - 1:end], b'\n')
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+""" Module for testing the reader/writer lock"""
+import threading
+import unittest
+from models.engine.locks import RWLock
+
+
+class test_RWLock(unittest.TestCase):
+    """ Class to test RWLock """
+
+    def test_readers_share(self):
+        """ Two threads read at once """
+        lock = RWLock()
+        both = threading.Barrier(2, timeout=5)
+
+        def read():
+            """ Waits for the other reader while holding the lock """
+            with lock.read():
+                both.wait()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        read()
+        thread.join()
+
+    def test_writer_excludes(self):
+        """ A writer waits for the reader to leave """
+        lock = RWLock()
+        events = []
+        with lock.read():
+            def write():
+                """ Records when it got the lock """
+                with lock.write():
+                    events.append('write')
+            thread = threading.Thread(target=write)
+            thread.start()
+            thread.join(0.1)
+            events.append('read done')
+        thread.join()
+        self.assertEqual(events, ['read done', 'write'])
+
+    def test_reentrant(self):
+        """ Nested locks of one thread do not block """
+        lock = RWLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with lock.read():
+                with self.assertRaises(RuntimeError):
+                    with lock.write():
+                        pass
+        with lock.write():
+            pass
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+""" Module for testing the snapshot serializers"""
+import unittest
+import json
+import os
+from io import StringIO
+from datetime import datetime
+from unittest.mock import patch
+from models.engine import serializers
+from models.engine.serializers import iter_json_object, get_serializer
+
+
+class test_iterJsonObject(unittest.TestCase):
+    """ Class to test the streaming JSON reader """
+
+    def test_small_chunks(self):
+        """ Pairs are decoded even when split across chunks """
+        data = {'a': {'x': [1, 2], 'y': 'z}'}, 'b': 12345, 'c': {}}
+        for size in (1, 3, 1 << 16):
+            pairs = list(iter_json_object(StringIO(json.dumps(data)), size))
+            self.assertEqual(dict(pairs), data)
+
+    def test_empty_object(self):
+        """ An empty object yields nothing """
+        self.assertEqual(list(iter_json_object(StringIO(' { } '))), [])
+
+    def test_invalid(self):
+        """ Empty or truncated documents raise ValueError """
+        for text in ('', '[]', '{"a": 1', '{"a": 1 "b": 2}'):
+            with self.assertRaises(ValueError):
+                list(iter_json_object(StringIO(text), 2))
+
+
+class test_serializers(unittest.TestCase):
+    """ Class to test every registered snapshot format """
+
+    records = [
+        ('State.1', {'id': '1', '__class__': 'State', 'name': 'CA',
+                     'created_at': datetime(2017, 9, 28, 21, 3, 54, 52298),
+                     'updated_at': datetime(2017, 9, 28, 21, 3, 54, 52302)}),
+        ('Place.2', {'id': '2', '__class__': 'Place', 'amenity_ids': ['a'],
+                     'latitude': 37.77, 'number_rooms': 4}),
+    ]
+
+    def tearDown(self):
+        """ Remove converted files """
+        for name in serializers.serializers:
+            try:
+                os.remove('test.' + name)
+            except FileNotFoundError:
+                pass
+
+    def test_round_trip(self):
+        """ Records read back equal the records written """
+        for name in serializers.serializers:
+            with self.subTest(format=name):
+                fmt = get_serializer(name)
+                with open('test.' + name, 'wb' if fmt.binary else 'w') as f:
+                    fmt.dump(iter(self.records), f)
+                with open('test.' + name, 'rb' if fmt.binary else 'r') as f:
+                    loaded = dict(fmt.load(f))
+                expected = dict(self.records)
+                if not fmt.binary:
+                    loaded['State.1']['created_at'] = datetime.fromisoformat(
+                        loaded['State.1']['created_at'])
+                    loaded['State.1']['updated_at'] = datetime.fromisoformat(
+                        loaded['State.1']['updated_at'])
+                self.assertEqual(loaded, expected)
+
+    def test_convert(self):
+        """ convert turns a JSON snapshot into a binary one and back """
+        fmt = get_serializer('json')
+        with open('test.json', 'w') as f:
+            fmt.dump(iter(self.records), f)
+        serializers.convert('test.json', 'test.pickle')
+        with open('test.pickle', 'rb') as f:
+            loaded = dict(get_serializer('pickle').load(f))
+        self.assertEqual(loaded['State.1']['created_at'],
+                         self.records[0][1]['created_at'])
+        serializers.convert('test.pickle', 'test.json')
+        with open('test.json') as f:
+            self.assertEqual(json.load(f)['State.1']['created_at'],
+                             '2017-09-28T21:03:54.052298')
+
+    def test_unknown_format(self):
+        """ An unknown format name raises ValueError """
+        with self.assertRaises(ValueError):
+            get_serializer('xml')
+
+    def test_storage_binary_format(self):
+        """ FileStorage saves and reloads a binary snapshot """
+        from models.engine.file_storage import FileStorage
+        from models.state import State
+        with patch.dict(os.environ, {'HBNB_FILE_FORMAT': 'pickle'}):
+            storage = FileStorage()
+        storage.all().clear()
+        state = State()
+        state.name = 'California'
+        storage.new(state)
+        storage.save()
+        storage.all().clear()
+        storage.reload()
+        os.remove('file.pickle')
+        loaded = storage.all(State)['State.' + state.id]
+        self.assertEqual(loaded.name, 'California')
+        self.assertEqual(loaded.created_at, state.created_at)
+        storage.all().clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
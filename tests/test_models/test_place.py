@@ -67,3 +67,28 @@ class test_Place(test_basemodel):
         """ """
         new = self.value()
         self.assertEqual(type(new.amenity_ids), list)
+
+    def test_amenities(self):
+        """ amenities follows the place's own amenity_ids """
+        from models import storage
+        from models.amenity import Amenity
+        new = self.value()
+        other = self.value()
+        amenity = Amenity()
+        storage.new(amenity)
+        new.amenities = amenity
+        new.amenities = amenity
+        self.assertEqual(new.amenities, [amenity])
+        self.assertEqual(other.amenities, [])
+        storage.delete(amenity)
+
+    def test_reviews(self):
+        """ reviews only returns the reviews linked to the place """
+        from models import storage
+        from models.review import Review
+        new = self.value()
+        review = Review()
+        review.place_id = new.id
+        storage.new(review)
+        self.assertEqual(new.reviews, [review])
+        storage.delete(review)
@@ -17,3 +17,19 @@ class test_state(test_basemodel):
         """ """
         new = self.value()
         self.assertEqual(type(new.name), str)
+
+    def test_cities(self):
+        """ cities only returns the cities linked to the state """
+        from models import storage
+        from models.city import City
+        new = self.value()
+        city = City()
+        city.state_id = new.id
+        other = City()
+        other.state_id = 'other'
+        storage.new(city)
+        storage.new(other)
+        self.assertEqual(new.cities, [city])
+        storage.delete(city)
+        storage.delete(other)
+        self.assertEqual(new.cities, [])
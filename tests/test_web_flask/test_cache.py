@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+""" Module for testing the response cache of the web_flask apps"""
+import unittest
+import importlib
+import json
+import os
+import shutil
+from unittest.mock import patch
+from models import storage
+from models.state import State
+import web_flask.cache
+from web_flask.cache import ResponseCache, cache
+
+
+class test_responseCache(unittest.TestCase):
+    """ Class to test the response cache """
+
+    def setUp(self):
+        """ Empty the storage and the cache """
+        storage.all().clear()
+        cache.clear()
+        self.client = importlib.import_module(
+            'web_flask.7-states_list').app.test_client()
+
+    def tearDown(self):
+        """ Remove storage file at end of tests """
+        storage.all().clear()
+        cache.clear()
+        shutil.rmtree('file.json.d', ignore_errors=True)
+        for path in ('file.json', 'file.json.journal',
+                     'file.json.journal.old'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def serve(self, **env):
+        """ Serves the pages from a storage built with the given variables
+        and returns it """
+        from models.engine.file_storage import FileStorage
+        with patch.dict(os.environ, env):
+            served = FileStorage()
+        served.reload()
+        app = importlib.import_module('web_flask.7-states_list')
+        for module in (app, web_flask.cache):
+            patcher = patch.object(module, 'storage', served)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return served
+
+    def test_etag_and_invalidation(self):
+        """ pages are served from the cache until storage changes """
+        state = State()
+        state.name = 'Ohio'
+        storage.new(state)
+        storage.save()
+        first = self.client.get('/states_list')
+        self.assertIn(b'Ohio', first.data)
+        hits = cache.hits
+        with patch.object(storage, 'query') as query:
+            again = self.client.get('/states_list')
+            self.assertFalse(query.called)
+        self.assertEqual(cache.hits, hits + 1)
+        self.assertEqual(again.data, first.data)
+        etag = first.headers['ETag']
+        response = self.client.get('/states_list',
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        other = State()
+        other.name = 'Utah'
+        storage.new(other)
+        storage.save()
+        response = self.client.get('/states_list',
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Utah', response.data)
+
+    def test_journal(self):
+        """ records another process appends to the journal show up """
+        journaled = self.serve(HBNB_FILE_JOURNAL='1', HBNB_FILE_SHARED='0')
+        state = State()
+        state.name = 'Ohio'
+        journaled.new(state)
+        journaled.save()
+        self.assertIn(b'Ohio', self.client.get('/states_list').data)
+        hits = cache.hits
+        self.client.get('/states_list')
+        self.assertEqual(cache.hits, hits + 1)
+        other = State()
+        other.name = 'Utah'
+        with open('file.json.journal', 'a') as f:
+            f.write(json.dumps(['State.' + other.id, other.to_dict()]) +
+                    '\n')
+        journaled.close()
+        self.assertIn(b'Utah', self.client.get('/states_list').data)
+
+    def test_shards(self):
+        """ a sharded storage serves cached pages until a shard changes """
+        sharded = self.serve(HBNB_FILE_SHARDS='2')
+        state = State()
+        state.name = 'Ohio'
+        sharded.new(state)
+        sharded.save()
+        self.client.get('/states_list')
+        hits, misses = cache.hits, cache.misses
+        for i in range(3):
+            self.client.get('/states_list')
+        self.assertEqual((cache.hits, cache.misses), (hits + 3, misses))
+        state.name = 'Utah'
+        sharded.new(state)
+        sharded.save()
+        self.assertIn(b'Utah', self.client.get('/states_list').data)
+        self.assertEqual(cache.misses, misses + 1)
+
+    def test_async_db_refused(self):
+        """ the apps refuse the async db engine they cannot await """
+        import subprocess
+        import sys
+        env = dict(os.environ, HBNB_TYPE_STORAGE='async_db',
+                   HBNB_DB_URL='sqlite://')
+        out = subprocess.run([sys.executable, '-c', 'import web_flask.cache'],
+                             env=env, capture_output=True, text=True)
+        self.assertNotEqual(out.returncode, 0)
+        self.assertIn('async_db is not supported', out.stderr)
+
+    def test_bounds(self):
+        """ the least recently used and the expired pages are dropped """
+        pages = ResponseCache(size=2, ttl=10)
+        for key in 'abc':
+            pages.put(key, 1, key)
+        self.assertIsNone(pages.get('a', 1))
+        self.assertEqual(pages.get('b', 1)[1], 'b')
+        self.assertIsNone(pages.get('b', 2))
+        with patch('time.monotonic', return_value=float('inf')):
+            self.assertIsNone(pages.get('c', 1))
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+""" Module for testing the states pages of the web_flask apps"""
+import unittest
+import importlib
+import os
+from unittest.mock import patch
+from models import storage
+from models.city import City
+from models.state import State
+from web_flask.cache import cache
+
+
+class test_states(unittest.TestCase):
+    """ Class to test the /states routes """
+
+    def setUp(self):
+        """ Empty the storage and the cache """
+        storage.all().clear()
+        cache.clear()
+        self.client = importlib.import_module(
+            'web_flask.9-states').app.test_client()
+
+    def tearDown(self):
+        """ Remove storage file at end of tests """
+        storage.all().clear()
+        cache.clear()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_states(self):
+        """ the pages read the storage without iterating all() """
+        state = State()
+        state.name = 'Ohio'
+        storage.new(state)
+        city = City()
+        city.name = 'Akron'
+        city.state_id = state.id
+        storage.new(city)
+        with patch.object(storage, 'all', side_effect=AssertionError):
+            self.assertIn(b'Ohio', self.client.get('/states').data)
+            page = self.client.get('/states/' + state.id).data
+            self.assertIn(b'Akron', page)
+            self.assertIn(b'Not found!', self.client.get('/states/x').data)
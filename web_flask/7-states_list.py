@@ -3,6 +3,7 @@
 from flask import Flask, render_template
 from models import storage
 from models.state import State
+from web_flask.cache import cache
 
 
 app = Flask(__name__)
@@ -15,10 +16,10 @@ def teardown_session(exception):
 
 
 @app.route("/states_list", strict_slashes=False)
+@cache.cached
 def display_html():
     """Function called with /states_list route"""
-    states = storage.all(State)
-    dict_to_html = {value.id: value.name for value in states.values()}
+    dict_to_html = dict(storage.query(State, columns=('id', 'name')))
     return render_template("7-states_list.html",
                            Table="States", items=dict_to_html)
 
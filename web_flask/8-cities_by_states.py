@@ -4,6 +4,7 @@ from flask import Flask, render_template
 from models import storage
 from models.state import State
 from models.city import City
+from web_flask.cache import cache
 
 
 app = Flask(__name__)
@@ -16,9 +17,11 @@ def teardown_session(exception):
 
 
 @app.route("/cities_by_states", strict_slashes=False)
+@cache.cached
 def display_html():
     """Function called with /states_list route"""
-    states = storage.all(State)
+    # one query for the states and their cities under DBStorage
+    states = storage.query(State, order_by='name', load={'cities': 'joined'})
     return render_template("8-cities_by_states.html",
                            Table="States", states=states)
 
@@ -4,6 +4,7 @@ from flask import Flask, render_template
 from models import storage
 from models.state import State
 from models.city import City
+from web_flask.cache import cache
 
 
 app = Flask(__name__)
@@ -17,20 +18,19 @@ def teardown_session(exception):
 
 @app.route("/states/", strict_slashes=False)
 @app.route("/states/<id>", strict_slashes=False)
+@cache.cached
 def display_html(id=None):
     """Function called with /states route"""
-    states = storage.all(State)
-
     if not id:
-        dict_to_html = {value.id: value.name for value in states.values()}
+        dict_to_html = dict(storage.query(State, columns=('id', 'name')))
         return render_template("7-states_list.html",
                                Table="States", items=dict_to_html)
 
-    k = "State.{}".format(id)
-    if k in states:
+    state = storage.get(State, id)
+    if state is not None:
         return render_template(
-            "9-states.html", Table="State: {}".format(states[k].name),
-            items=states[k]
+            "9-states.html", Table="State: {}".format(state.name),
+            items=state
         )
 
     return render_template("9-states.html", items=None)
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""
+Contains the class ResponseCache, which keeps the pages rendered by the
+web_flask routes
+
+The routes are WSGI views reading the storage synchronously, so the apps
+importing this module refuse HBNB_TYPE_STORAGE=async_db, whose reads are
+coroutines; an ASGI app awaits its query() and reads generation().
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from os import getenv
+from flask import make_response, request
+import models
+from models import storage
+
+if models.storage_t == "async_db":
+    raise ImportError("the web_flask apps need a synchronous storage: "
+                      "HBNB_TYPE_STORAGE=async_db is not supported")
+
+
+class ResponseCache:
+    """LRU cache of rendered pages, keyed by route and arguments
+
+    A page is served again while storage.generation() has not changed
+    since it was rendered, for at most ttl seconds (changes made by
+    other processes to a database are only seen once it expires), and
+    the size most recently used pages are kept. Every page carries an
+    ETag made from its content, so a client sending it back in
+    If-None-Match gets a 304 Not Modified.
+
+    Usage: @app.route(...) above @cache.cached
+    """
+
+    def __init__(self, size=256, ttl=300):
+        """Instantiate a ResponseCache object"""
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__pages = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, generation):
+        """Returns the (etag, body) stored under key for generation, or
+        None when there is none or it expired"""
+        with self.__lock:
+            page = self.__pages.get(key)
+            if page is None or page[0] != generation or \
+                    page[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self.__pages.move_to_end(key)
+            self.hits += 1
+            return page[2:]
+
+    def put(self, key, generation, body):
+        """Stores body under key for generation and returns its (etag,
+        body), dropping the least recently used pages over size"""
+        data = body.encode() if isinstance(body, str) else body
+        etag = hashlib.blake2b(data, digest_size=16).hexdigest()
+        with self.__lock:
+            self.__pages[key] = (generation, time.monotonic() + self.ttl,
+                                 etag, body)
+            self.__pages.move_to_end(key)
+            while len(self.__pages) > self.size:
+                self.__pages.popitem(last=False)
+        return etag, body
+
+    def clear(self):
+        """Drops every page"""
+        with self.__lock:
+            self.__pages.clear()
+
+    def cached(self, view):
+        """Decorates a view returning a page so that it is rendered only
+        when the cached one is stale"""
+        @wraps(view)
+        def wrapper(**kwargs):
+            """Serves the cached page of the view, or renders it"""
+            if self.size <= 0 or self.ttl <= 0:
+                return view(**kwargs)
+            key = (request.endpoint, tuple(sorted(kwargs.items())))
+            generation = storage.generation()
+            page = self.get(key, generation)
+            if page is None:
+                page = self.put(key, generation, view(**kwargs))
+            etag, body = page
+            response = make_response(body)
+            response.set_etag(etag)
+            return response.make_conditional(request)
+        return wrapper
+
+
+cache = ResponseCache(int(getenv('HBNB_CACHE_SIZE', 256)),
+                      float(getenv('HBNB_CACHE_TTL', 300)))